@@ -1,11 +1,29 @@
 import os
 import re
 import json
-from datetime import datetime
+import time
+import asyncio
+from typing import List
+from uuid import uuid4
 from langchain_community.document_loaders import PyPDFLoader
 from uagents import Agent, Context, Model
 from utils.DocToGDrive import grivePipe
-from utils.asiChat import llmChat
+from utils.asiChat import llmChatAsync
+from utils.BankParsers import parse_with_layouts
+from utils.BalanceValidator import repair_balance_chain
+from utils.pageCache import get_cached_page, cache_page
+from utils.TransactionStore import get_store
+from utils.JobQueue import get_job_queue, MAX_JOB_ATTEMPTS
+from utils.httpSideServer import start_side_server
+from aiohttp import web
+
+# Maximum number of pages sent to the LLM at the same time while extracting a file.
+MAX_PAGES_IN_FLIGHT = int(os.getenv("MAX_PAGES_IN_FLIGHT", "4"))
+# How many times a page whose running balance does not add up is sent back to the LLM.
+MAX_PAGE_REEXTRACTIONS = int(os.getenv("MAX_PAGE_REEXTRACTIONS", "1"))
+# Attempts per LLM page call; failed calls are retried after PAGE_RETRY_BACKOFF * 2 ** (attempt - 1) seconds.
+MAX_PAGE_ATTEMPTS = int(os.getenv("MAX_PAGE_ATTEMPTS", "3"))
+PAGE_RETRY_BACKOFF = float(os.getenv("PAGE_RETRY_BACKOFF", "1"))  # seconds
 
 
 #############################################
@@ -22,12 +40,13 @@ def process_pdf_file(file_path):
 #############################################
 # Step 2: LLM Extraction of Transaction Table per Page
 #############################################
-def extract_transactions_from_page(page_text):
+async def extract_transactions_from_page(page_text, temperature=0.2):
     """
     Send a single page's text to the LLM to extract any transaction data.
     The LLM is expected to return a JSON array of transaction objects with keys:
     Date, Particulars, Deposit, Withdrawal, and Balance.
     Transactions without a valid date should be ignored.
+    Raises ValueError if the LLM output cannot be parsed.
     """
     prompt = """
 You are an assistant that extracts transaction data from a financial document page input.
@@ -46,18 +65,20 @@ Return ONLY a valid JSON array. No commentary or code blocks.
 
 If the page does not contain any transactions, return an empty JSON array.
 """
-    response = llmChat([
+    response = await llmChatAsync([
                         {"role": "system", "content": prompt},
                         {"role": "user", "content": f"Page text:\n {page_text}"}
                         ],
-                       temperature=0.2,
+                       temperature=temperature,
                        max_tokens=10000)
     try:
         res = json.loads(response)["choices"][0]["message"]["content"]
         json_text_match = re.search(r"```json\n(.*?)```", res, re.DOTALL)
-        json_text = json_text_match.group(1) if json_text_match else response
+        json_text = json_text_match.group(1) if json_text_match else res
 
         transactions = json.loads(json_text)
+        if not isinstance(transactions, list):
+            raise ValueError("expected a JSON array of transactions")
 
         # Replace None with math.nan in numeric fields
         for txn in transactions:
@@ -66,8 +87,8 @@ If the page does not contain any transactions, return an empty JSON array.
                     txn[field] = None
         print(transactions)
     except Exception as e:
-        print("Error parsing LLM output for page. Using empty transactions. Error:", e)
-        transactions = []
+        print("Error parsing LLM output for page. Error:", e)
+        raise ValueError(f"Could not parse LLM output for page: {e}") from e
     return transactions
 
 # def extract_transaction_table(pages_text):
@@ -95,73 +116,300 @@ If the page does not contain any transactions, return an empty JSON array.
 #         i += 2
 #     return all_transactions
 
-def extract_transaction_table(pages_text):
+async def extract_page(page_no, page_text, semaphore, temperature=0.2):
     """
-    Process each page individually by calling the LLM to extract transactions.
-    Combine the results from all pages into a single table.
+    Extract a single page while holding a slot of the semaphore, retrying failed calls
+    with exponential backoff (the slot is released while waiting) up to MAX_PAGE_ATTEMPTS.
+    Never raises: a page that keeps failing yields an empty transaction list and its error,
+    so one bad page does not lose the rest of the file.
     """
-    all_transactions = []
+    elapsed, transactions = 0.0, []
+    for attempt in range(1, MAX_PAGE_ATTEMPTS + 1):
+        async with semaphore:
+            print(f"Processing page {page_no} via LLM..." + (f" (attempt {attempt})" if attempt > 1 else ""))
+            start = time.perf_counter()
+            error = None
+            try:
+                transactions = await extract_transactions_from_page(page_text, temperature)
+            except Exception as e:
+                print(f"Page {page_no} failed:", e)
+                transactions, error = [], str(e)
+            elapsed += time.perf_counter() - start
+        if error is None or attempt == MAX_PAGE_ATTEMPTS:
+            break
+        await asyncio.sleep(PAGE_RETRY_BACKOFF * 2 ** (attempt - 1))
+    if not isinstance(transactions, list):
+        transactions = []
+    return {"page": page_no, "transactions": transactions, "seconds": elapsed, "error": error,
+            "attempts": attempt}
+
+
+def parse_pages_locally(pages_text, known_pages=None):
+    """
+    Tier 1: take pages already extracted by an interrupted job from `known_pages`
+    ({page number: transactions}), look every other page up in the page cache, then
+    run the deterministic bank layout parsers over the rest, in order, carrying each
+    page's closing balance into the next one.
+    Returns a list with a result dict for each resolved page and None for pages that need the LLM.
+    """
+    known_pages = known_pages or {}
+    page_results = []
+    opening_balance, previous_parser = None, None
     for i, page_text in enumerate(pages_text):
-        print(f"Processing page {i+1} via LLM...")
-        transactions = extract_transactions_from_page(page_text)
-        if isinstance(transactions, list):
-            all_transactions.extend(transactions)
+        start = time.perf_counter()
+        source = "resumed" if i + 1 in known_pages else "cache"
+        transactions = known_pages[i + 1] if source == "resumed" else get_cached_page(page_text)
+        if transactions is None:
+            parsed = parse_with_layouts(page_text, opening_balance, previous_parser)
+            if parsed is None:
+                page_results.append(None)
+                opening_balance, previous_parser = None, None
+                continue
+            source, transactions = parsed
+        previous_parser = source if source not in ("cache", "resumed") else previous_parser
+        opening_balance = transactions[-1].get("Balance") if transactions else opening_balance
+        page_results.append({"page": i + 1, "transactions": transactions,
+                             "seconds": time.perf_counter() - start, "error": None,
+                             "source": source})
+    return page_results
+
+
+async def extract_pages(pages_text, max_in_flight=None, known_pages=None, on_page=None):
+    """
+    Extract all pages, reusing `known_pages` and trying the page cache and local layout
+    parsers first, and sending only the remaining pages to the LLM, with at most
+    `max_in_flight` LLM calls open at once.
+    `on_page`, if given, is called (in a worker thread) with each newly extracted page's
+    result as soon as it is ready, so callers can persist progress.
+    Returns one result dict per page (page, transactions, seconds, error, source), in page order.
+    """
+    page_results = parse_pages_locally(pages_text, known_pages)
+    llm_pages = [i for i, result in enumerate(page_results) if result is None]
+    print(f"Resolved {len(pages_text) - len(llm_pages)} of {len(pages_text)} pages locally; "
+          f"{len(llm_pages)} pages go to the LLM.")
+    if on_page:
+        for result in page_results:
+            if result is not None and result["source"] != "resumed":
+                await asyncio.to_thread(on_page, result)
+
+    semaphore = asyncio.Semaphore(max_in_flight or MAX_PAGES_IN_FLIGHT)
+
+    async def extract_llm_page(i):
+        result = await extract_page(i + 1, pages_text[i], semaphore)
+        result["source"] = "llm"
+        if on_page and not result["error"]:
+            await asyncio.to_thread(on_page, result)
+        return result
+
+    llm_results = await asyncio.gather(*(extract_llm_page(i) for i in llm_pages))
+    for i, result in zip(llm_pages, llm_results):
+        page_results[i] = result
+
+    await validate_pages(pages_text, page_results, max_in_flight)
+
+    # Remember pages that extracted cleanly so re-uploads skip them entirely.
+    for i, result in enumerate(page_results):
+        if result["source"] not in ("cache", "resumed") and not result["error"] and not result["broken_links"]:
+            await asyncio.to_thread(cache_page, pages_text[i], result["transactions"])
+
+    for result in page_results:
+        status = "failed: " + result["error"] if result["error"] else f"{len(result['transactions'])} transactions"
+        if result["broken_links"]:
+            status += f", {len(result['broken_links'])} broken balance links"
+        print(f"Page {result['page']} ({result['source']}): {result['seconds']:.2f}s, {status}")
+    return page_results
+
+
+def _opening_balance(page_results, index):
+    """Closing balance of the page before `index`, if it has any transactions."""
+    if index == 0 or not page_results[index - 1]["transactions"]:
+        return None
+    return page_results[index - 1]["transactions"][-1].get("Balance")
+
+
+async def validate_pages(pages_text, page_results, max_in_flight=None):
+    """
+    Check the running-balance chain of every page, in place.
+
+    Rows whose Deposit/Withdrawal were swapped by the LLM are repaired directly.
+    Pages that still have broken links are re-extracted (at temperature 0), up to
+    MAX_PAGE_REEXTRACTIONS times, keeping whichever extraction has fewer broken links.
+    Pages resumed from an interrupted job were already validated and are not re-extracted.
+    Each result gets "broken_links" (row indices) and "swapped" (repaired row count).
+    """
+    for i, result in enumerate(page_results):
+        report = repair_balance_chain(result["transactions"], _opening_balance(page_results, i))
+        result["broken_links"] = report["broken"]
+        result["swapped"] = len(report["swapped"])
+
+    semaphore = asyncio.Semaphore(max_in_flight or MAX_PAGES_IN_FLIGHT)
+    for attempt in range(MAX_PAGE_REEXTRACTIONS):
+        bad_pages = [i for i, result in enumerate(page_results)
+                     if result["broken_links"] and result["source"] != "resumed"]
+        if not bad_pages:
+            break
+        print(f"Re-extracting pages {[i + 1 for i in bad_pages]} (attempt {attempt + 1}): balance chain broken.")
+        retries = await asyncio.gather(
+            *(extract_page(i + 1, pages_text[i], semaphore, temperature=0) for i in bad_pages)
+        )
+        for i, retry in zip(bad_pages, retries):
+            if retry["error"] or not retry["transactions"]:
+                continue
+            report = repair_balance_chain(retry["transactions"], _opening_balance(page_results, i))
+            if len(report["broken"]) < len(page_results[i]["broken_links"]):
+                page_results[i].update(transactions=retry["transactions"], source="llm",
+                                       broken_links=report["broken"], swapped=len(report["swapped"]))
+            page_results[i]["seconds"] += retry["seconds"]
+
+
+async def extract_transaction_table(pages_text, max_in_flight=None):
+    """
+    Process each page individually, with the local layout parsers or the LLM,
+    to extract transactions (see extract_pages). Results are combined into a
+    single table in page order.
+    """
+    page_results = await extract_pages(pages_text, max_in_flight)
+    all_transactions = []
+    for result in page_results:
+        all_transactions.extend(result["transactions"])
     return all_transactions
 
 
 #############################################
-# Step 4: Append the Table into processed_output.json by Month-Year
+# Step 4: Append the Table into the transaction store (grouped by Month-Year)
 #############################################
-def update_processed_output(table, output_file="INFO/processed_output.json"):
-    # Load existing data if the file exists, else start with an empty dict.
-    if os.path.exists(output_file):
-        try:
-            with open(output_file, "r", encoding="utf-8") as infile:
-                data = json.load(infile)
-                if not isinstance(data, dict):
-                    data = {}
-        except json.JSONDecodeError:
-            data = {}
+def update_processed_output(table):
+    """
+    Append extracted transactions to the transaction store.
+    Rows already stored by an earlier (or overlapping) statement are skipped.
+    Returns the newly stored transactions.
+    """
+    #TODO: Change deposit and withdrawal to float and make sure that they are stored as 'deposited to bank' and 'withdrawn from bank'
+    new_transactions = get_store().append(table)
+    print(f"Stored {len(new_transactions)} new transactions, skipped {len(table) - len(new_transactions)} duplicates or undated rows.")
+    return new_transactions
+
+
+#############################################
+# Background ingest jobs: steps 1-5 for each queued PDF file.
+#############################################
+# Number of ingest workers, i.e. files processed at the same time.
+MAX_FILES_IN_FLIGHT = int(os.getenv("MAX_FILES_IN_FLIGHT", "3"))
+# Idle workers check for due retries this often even when nothing new is enqueued.
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# Port of the side server answering GET /jobs/{id}.
+JOBS_PORT = int(os.getenv("JOBS_PORT", "8012"))
+
+jobs_available = asyncio.Event()
+_worker_tasks = set()
+
+
+def enqueue_files(file_names, batch_id=None):
+    """
+    Queue one ingest job per file. Returns the job ids. Blocking (runs in a worker
+    thread); callers then set jobs_available on the event loop to wake the workers.
+    """
+    queue = get_job_queue()
+    return [queue.enqueue(name, batch_id) for name in dict.fromkeys(file_names)]
+
+
+async def ingest_job(job):
+    """
+    Ingest the PDF of a claimed job: parse it into pages, extract the transactions of
+    each page, append the new ones to the transaction store and upload them to Google Drive.
+    Every extracted page is saved to the queue, so a retry or a restart after a crash
+    only extracts the pages not done yet, and a job that stored its rows but did not
+    finish uploading them uploads them on its next attempt.
+    Raises if pages still fail while the job has attempts left, so it is retried later;
+    on the last attempt the pages that were extracted are stored and the job is "partial".
+    """
+    queue = get_job_queue()
+    job_id = job["id"]
+    file_path = os.path.join("INFO/data", job["file_name"])
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"No such file: {file_path}")
+
+    await asyncio.to_thread(queue.update, job_id, stage="parsing")
+    pages_text = await asyncio.to_thread(process_pdf_file, file_path)
+    known_pages = await asyncio.to_thread(queue.completed_pages, job_id)
+    if known_pages:
+        print(f"Job {job_id}: resuming {job['file_name']} with {len(known_pages)} of {len(pages_text)} pages done.")
+
+    def save_page(result):
+        queue.save_page(job_id, result["page"], result["transactions"], result["source"])
+
+    await asyncio.to_thread(queue.update, job_id, stage="extracting", pages=len(pages_text))
+    page_results = await extract_pages(pages_text, known_pages=known_pages, on_page=save_page)
+    # Balance validation may have repaired or re-extracted pages; keep the final versions.
+    for result in page_results:
+        if not result["error"] and result["source"] != "resumed":
+            await asyncio.to_thread(save_page, result)
+    failed_pages = [result["page"] for result in page_results if result["error"]]
+    if failed_pages and job["attempts"] < MAX_JOB_ATTEMPTS:
+        raise RuntimeError(f"Pages {failed_pages} could not be extracted.")
+    transaction_table = [txn for result in page_results for txn in result["transactions"]]
+
+    # The store mark is saved before appending, so if the process dies between the append
+    # and the Drive upload, the next attempt can still find the rows this job inserted.
+    store = get_store()
+    if job["store_mark"] is None:
+        mark = await asyncio.to_thread(store.last_id)
+        await asyncio.to_thread(queue.update, job_id, stage="storing", store_mark=mark)
+        new_transactions = await asyncio.to_thread(update_processed_output, transaction_table)
     else:
-        data = {}
+        await asyncio.to_thread(queue.update, job_id, stage="storing")
+        await asyncio.to_thread(update_processed_output, transaction_table)  # no-op if the earlier append committed
+        new_transactions = await asyncio.to_thread(store.read_inserted_since, job["store_mark"], transaction_table)
+        print(f"Job {job_id}: {len(new_transactions)} transactions stored by an earlier attempt still to upload.")
+    await asyncio.to_thread(queue.update, job_id, stage="uploading")
+    await asyncio.to_thread(grivePipe, new_transactions)
+
+    error = f"Pages {failed_pages} could not be extracted." if failed_pages else None
+    await asyncio.to_thread(queue.finish, job_id, len(transaction_table), len(new_transactions), error)
+
 
-    # For each transaction, determine the month and year from the Date field and append.
-    for txn in table:
-        date_str = txn.get("Date", "")
+async def ingest_worker(worker_no):
+    """Claim and run queued jobs forever; failed jobs go back to the queue with backoff."""
+    queue = get_job_queue()
+    while True:
+        jobs_available.clear()
+        job = await asyncio.to_thread(queue.claim)
+        if job is None:
+            try:
+                await asyncio.wait_for(jobs_available.wait(), JOB_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        print(f"Worker {worker_no}: ingesting {job['file_name']} (job {job['id']}, attempt {job['attempts']})")
         try:
-            dt = datetime.strptime(date_str, "%d-%m-%Y")
-            month_year = dt.strftime("%b-%y")  # e.g., "Dec-24", "Jan-25"
-        except Exception:
-            continue  # Skip transactions with invalid or missing dates.
-        if month_year not in data:
-            data[month_year] = []
-        data[month_year].append(txn)
-        #TODO: Change deposit and withdrawal to float and make sure that they are stored as 'deposited to bank' and 'withdrawn from bank'
-    with open(output_file, "w", encoding="utf-8") as outfile:
-        json.dump(data, outfile, indent=4)
-    print("Processed output updated in", output_file)
+            await ingest_job(job)
+            print(f"Worker {worker_no}: job {job['id']} done.")
+        except Exception as e:
+            print(f"Worker {worker_no}: job {job['id']} failed:", e)
+            retrying = await asyncio.to_thread(queue.retry_or_fail, job["id"], str(e),
+                                               isinstance(e, FileNotFoundError))
+            print(f"Job {job['id']} " + ("will be retried." if retrying else "gave up."))
 
 
-#############################################
-# Main function tying steps 1-5 together for a PDF file.
-#############################################
-def process_pdf_and_extract_transactions(file_path):
-    print(f"Processing file: {file_path}")
-    # Step 1: Parse PDF into pages (each page as a separate text)
-    pages_text = process_pdf_file(file_path)
-    
-    # Step 2: Extract Transaction Table via LLM on each page and combine results.
-    transaction_table = extract_transaction_table(pages_text)
-    
-    # Step 3: (The table is now stored in transaction_table.)
-    
-    # Step 4: Update processed_output.json by Month-Year
-    update_processed_output(transaction_table)
-    
-    # Step 5: Upload table chunks to Google Drive
-    grivePipe(transaction_table)
-    
-    return transaction_table
+async def job_status(request):
+    """GET /jobs/{id}: the job's status, stage, page progress and counts."""
+    job = await asyncio.to_thread(get_job_queue().get, request.match_info["job_id"])
+    if job is None:
+        return web.json_response({"error": "Unknown job id."}, status=404)
+    return web.json_response(job)
+
+
+def batch_status(batch_id):
+    jobs = get_job_queue().batch(batch_id)
+    if not jobs:
+        return None
+    files = [{"file": job["file_name"], "job_id": job["id"], "status": job["status"], "stage": job["stage"],
+              "pages": job["pages"], "pages_done": job["pages_done"], "transactions": job["transactions"],
+              "new": job["new"], "attempts": job["attempts"], "seconds": job["seconds"], "error": job["error"]}
+             for job in jobs]
+    done = sum(f["status"] in ("done", "partial", "failed") for f in files)
+    return {"batch_id": batch_id, "done": done, "total": len(files), "finished": done == len(files),
+            "files": files}
 
 #############################################
 # Making agent
@@ -171,43 +419,88 @@ class InputReaderAgentMessage(Model):
     message: str
 
 class InputReaderAgentMessageResponse(Model):
-    ftd: list
+    job_id: str  # poll GET /jobs/{job_id} on JOBS_PORT for progress
 
 InputReaderParseAgent = Agent(name="InputReaderAgent", seed="InputReaderAgent recovery phrase", port=8002, mailbox=True)
 
+@InputReaderParseAgent.on_event("startup")
+async def start_ingest_workers(ctx: Context):
+    requeued = await asyncio.to_thread(get_job_queue().requeue_interrupted)
+    if requeued:
+        print(f"Re-queued {requeued} ingest jobs interrupted by a restart.")
+    for worker_no in range(MAX_FILES_IN_FLIGHT):
+        task = asyncio.create_task(ingest_worker(worker_no))
+        _worker_tasks.add(task)  # keep a reference so the worker is not garbage collected
+    await start_side_server([web.get("/jobs/{job_id}", job_status)], JOBS_PORT)
+
+
 @InputReaderParseAgent.on_rest_post("/parse",InputReaderAgentMessage,InputReaderAgentMessageResponse)
 async def input_reader_agent(ctx: Context, message: InputReaderAgentMessage) -> InputReaderAgentMessageResponse:
     """
     Handles the input reader agent's message.
     
-    This agent processes the given PDF file by:
-      1. Parsing the PDF into pages.
-      2. Extracting the transaction table via LLM (one call per page).
-      3. Combining transactions from all pages.
-      4. Updating the processed_output.json by Month-Year.
-      5. Uploading transaction table chunks to Google Drive.
+    Queues the given PDF file for ingestion and returns the job id right away. A
+    background worker then:
+      1. Parses the PDF into pages.
+      2. Extracts the transaction table with the bank layout parsers, falling back
+         to the LLM (one call per page) for pages they cannot parse.
+      3. Combines transactions from all pages.
+      4. Appends new transactions to the transaction store by Month-Year.
+      5. Uploads transaction table chunks to Google Drive.
     
     Args:
         ctx (Context): The context of the agent.
         message (InputReaderAgentMessage): The message containing the filename to process.
     
     Returns:
-        InputReaderAgentMessageResponse: The response containing the processed transaction data.
+        InputReaderAgentMessageResponse: The id of the job, to poll GET /jobs/{id} with.
     """
-    
-    print("\n ------Parsing the input---------. \n")
-    
-    # Assume message.message contains the filename to process
-    file_name = message.message
-    file_path = os.path.join("INFO/data", file_name)
-    
-    # Call the unified function that processes the PDF and does all steps.
-    ftd = process_pdf_and_extract_transactions(file_path)
-    
-    print("\n ------Parsed the input successfully---------. \n")
-    print(InputReaderParseAgent.address)
-    
-    return InputReaderAgentMessageResponse(ftd=ftd)
+    job_id = (await asyncio.to_thread(enqueue_files, [message.message]))[0]
+    jobs_available.set()
+    print(f"Queued {message.message} as job {job_id}")
+    return InputReaderAgentMessageResponse(job_id=job_id)
+
+
+class ParseBatchMessage(Model):
+    messages: List[str]  # file names in INFO/data
+
+class ParseBatchResponse(Model):
+    batch_id: str
+    job_ids: List[str]
+
+class ParseStatusMessage(Model):
+    batch_id: str
+
+class ParseStatusResponse(Model):
+    batch_id: str
+    done: int
+    total: int
+    finished: bool
+    files: list  # one {"file", "job_id", "status", "stage", "pages", "pages_done", ...} dict per file
+
+
+@InputReaderParseAgent.on_rest_post("/parse/batch", ParseBatchMessage, ParseBatchResponse)
+async def parse_batch(ctx: Context, message: ParseBatchMessage) -> ParseBatchResponse:
+    """
+    Queues several files at once, to be ingested at most MAX_FILES_IN_FLIGHT at a time,
+    and returns immediately with a batch id to poll /parse/status with.
+    """
+    batch_id = uuid4().hex
+    job_ids = await asyncio.to_thread(enqueue_files, message.messages, batch_id)
+    jobs_available.set()
+    print(f"Queued batch {batch_id} with {len(job_ids)} files")
+    return ParseBatchResponse(batch_id=batch_id, job_ids=job_ids)
+
+
+@InputReaderParseAgent.on_rest_post("/parse/status", ParseStatusMessage, ParseStatusResponse)
+async def parse_status(ctx: Context, message: ParseStatusMessage) -> ParseStatusResponse:
+    """Returns per-file progress of a batch started with /parse/batch."""
+    status = await asyncio.to_thread(batch_status, message.batch_id)
+    if status is None:
+        return ParseStatusResponse(batch_id=message.batch_id, done=0, total=0, finished=True,
+                                   files=[{"file": "", "status": "failed", "stage": "failed",
+                                           "error": "Unknown batch id."}])
+    return ParseStatusResponse(**status)
 
 
 #############################################
@@ -215,11 +508,9 @@ async def input_reader_agent(ctx: Context, message: InputReaderAgentMessage) ->
 #############################################
 if __name__ == "__main__":
     InputReaderParseAgent.run()
-    # pdf_folder = "INFO/data"
-    # for filename in os.listdir(pdf_folder):
+    # To ingest every PDF in the folder, queue them before run(); the workers pick them up.
+    # for filename in os.listdir("INFO/data"):
     #     if filename.lower().endswith(".pdf"):
-    #         file_path = os.path.join(pdf_folder, filename)
-    #         process_pdf_and_extract_transactions(file_path)
-    # print("All PDFs processed.")
+    #         enqueue_files([filename])
     
     
@@ -8,11 +8,16 @@ from dotenv import load_dotenv, find_dotenv
 import os
 import json
 import re
+import asyncio
 from datetime import datetime
 from uagents import Agent, Bureau, Context, Model
 # from langchain_google_genai import ChatGoogleGenerativeAI
-from utils.asiChat import llmChat
+from utils.asiChat import llmChat, llmChatAsync
 from utils.DriveJSONRetriever import upload_my_file
+from utils.TransactionStore import TransactionSnapshot
+from utils.TransactionIndex import DateIndex, date_ordinal
+from utils.DateRangeParser import parse_date_ranges_locally, DATE_PARSER_MIN_CONFIDENCE
+from utils.SemanticCache import SemanticCache, today_scope
 
 
 
@@ -26,13 +31,12 @@ os.environ['LANGCHAIN_API_KEY'] = os.getenv("LANGSMITH_API_KEY")
 # os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
 
 
-# Function to get relevant transactions based on user query
-def get_relevance(user_query: str) -> List[str]:
+# Function to build the date range extraction prompt for a user query
+def build_relevance_prompt(user_query: str):
     """
-    Filters transactions based on user query and returns a list containing:
-    [relevant key, initial date, final date]
+    Returns the chat messages asking the LLM for the date ranges relevant to the user query.
     """
-    #TODO: Make this prompt dynamic for current date. Also maybe give this prompt some context from processed output. to give a good date range.
+    #TODO: Maybe give this prompt some context from processed output. to give a good date range.
     
     prompt_template = ChatPromptTemplate.from_messages([
     ("system",
@@ -46,7 +50,7 @@ def get_relevance(user_query: str) -> List[str]:
         '  "Withdrawal": null,\n'
         '  "Balance": 13913.0\n'
         "}}}}\n\n"
-        "Current year is 2025 and the current month is April. This is for context of current time, if its is required anywhere, otherwise donot use it.\n\n"
+        "Today's date is {today}. This is for context of current time, if its is required anywhere, otherwise donot use it.\n\n"
         "If user asks for starting date, then take it as 01-01-1999.\n"
         "Instructions:\n"
         "- Based on the user query, extract all relevant date ranges (in **DD-MM-YYYY** format) that cover the transactions of interest. \n"
@@ -105,12 +109,47 @@ def get_relevance(user_query: str) -> List[str]:
     # # other params...
 # )
     
-    prompt = prompt_template.format_messages(query=user_query)
+    return prompt_template.format_messages(query=user_query, today=datetime.now().strftime("%d-%m-%Y (%B %Y)"))
+
+
+def get_local_relevance(user_query: str) -> Optional[dict]:
+    """
+    Resolve the query's date ranges with the rule-based parser.
+    Returns {"date_ranges": [...]} when the parser is confident, otherwise None.
+    """
+    date_ranges, confidence = parse_date_ranges_locally(user_query)
+    if date_ranges and confidence >= DATE_PARSER_MIN_CONFIDENCE:
+        print(f"Date ranges parsed locally (confidence {confidence}): {date_ranges}")
+        return {"date_ranges": date_ranges}
+    return None
+
+
+# Function to get relevant transactions based on user query
+def get_relevance(user_query: str) -> List[str]:
+    """
+    Filters transactions based on user query and returns the date ranges of interest,
+    either parsed locally or as the raw LLM response.
+    """
+    local = get_local_relevance(user_query)
+    if local is not None:
+        return local
+    prompt = build_relevance_prompt(user_query)
     # response = model.invoke(prompt)
     response = llmChat(prompt)  # Clean up response
     
     return response
 
+
+async def get_relevance_async(user_query: str):
+    """Same as get_relevance, but awaits the LLM so the agent's event loop stays free."""
+    local = get_local_relevance(user_query)
+    if local is not None:
+        return local
+    prompt = build_relevance_prompt(user_query)
+    response = await llmChatAsync(prompt)
+    
+    return response
+
 # Example usage
 # user_query = "what i did in march this year betweeen 3rd and 5th"
 # result = get_relevance(user_query)
@@ -202,23 +241,13 @@ def get_relevance(user_query: str) -> List[str]:
 
 #UPDATED CODE
 
-def get_month_keys_in_range(start_dt: datetime, end_dt: datetime) -> List[str]:
-    """Return a list of month keys in the format '%b-%y' from start_dt to end_dt (inclusive)."""
-    keys = []
-    # Set current to the first day of the start month
-    current = datetime(start_dt.year, start_dt.month, 1)
-    # Continue until the current month exceeds the end date
-    while current <= end_dt:
-        keys.append(current.strftime("%b-%y"))
-        # Move to the next month
-        if current.month == 12:
-            current = datetime(current.year + 1, 1, 1)
-        else:
-            current = datetime(current.year, current.month + 1, 1)
-    return keys
-
-
-def get_relevant_transactions(result: str, database: dict):
+def parse_date_ranges(result) -> List[dict]:
+    """
+    Extract the list of {"start", "end"} date ranges from the relevance result:
+    either the raw LLM response or a {"date_ranges": [...]} dict from the local parser.
+    """
+    if isinstance(result, dict) and "date_ranges" in result:
+        return result["date_ranges"]
     try:
         # If result is not parsed yet
         outer_response = json.loads(result) if isinstance(result, str) else result
@@ -242,32 +271,29 @@ def get_relevant_transactions(result: str, database: dict):
     except Exception as e:
         print("Error parsing LLM JSON output:", e)
         return []
+    return date_ranges
+
+
+def get_relevant_transactions(result: str, database):
+    """
+    Returns the transactions falling in any of the date ranges of the relevance result.
+    `database` is a DateIndex, or a month key -> transactions dict (indexed on the fly).
+    """
+    date_ranges = parse_date_ranges(result)
+    if not date_ranges:
+        return []
 
-    all_filtered = []
-    # For each provided date range, compute which month keys are relevant.
+    ordinal_ranges = []
     for dr in date_ranges:
-        try:
-            start_dt = datetime.strptime(dr["start"], "%d-%m-%Y")
-            end_dt = datetime.strptime(dr["end"], "%d-%m-%Y")
-        except Exception as e:
-            print("Error parsing dates in range:", dr, e)
+        start, end = date_ordinal(dr.get("start")), date_ordinal(dr.get("end"))
+        if start is None or end is None:
+            print("Error parsing dates in range:", dr)
             continue
+        ordinal_ranges.append((start, end))
 
-        # Get month keys between start_dt and end_dt
-        month_keys = get_month_keys_in_range(start_dt, end_dt)
-        print(f"For date range {dr}, month keys to check: {month_keys}")
-
-        for key in month_keys:
-            if key in database:
-                transactions = database[key]
-                # Filter transactions in this key that lie within the date range
-                for txn in transactions:
-                    try:
-                        txn_date = datetime.strptime(txn["Date"], "%d-%m-%Y")
-                    except Exception:
-                        continue
-                    if start_dt <= txn_date <= end_dt:
-                        all_filtered.append(txn)
+    index = database if isinstance(database, DateIndex) else DateIndex.from_database(database)
+    all_filtered = index.query(ordinal_ranges)
+    print(f"Found {len(all_filtered)} transactions for date ranges {date_ranges}")
     return all_filtered
 
 
@@ -304,6 +330,11 @@ class ReleventDocumentAgentMessage(Model):
 class ReleventDocumentAgentResponse(Model):
     fld : list
 
+# Parsed copy of the transaction store, reloaded only when the store changes.
+transaction_snapshot = TransactionSnapshot()
+# Filtered transactions of recent queries; near-identical questions reuse them.
+relevance_cache = SemanticCache("relevance")
+
 ReleventDocumentAgent = Agent(name="ReleventDocumentAgent", seed="ReleventDocumentAgent recovery phrase", port=8003, mailbox=True)
 
 @ReleventDocumentAgent.on_rest_post("/rest/post", ReleventDocumentAgentMessage, ReleventDocumentAgentResponse)
@@ -318,16 +349,26 @@ async def relevent_document_agent(ctx: Context , message: ReleventDocumentAgentM
     """
     # print(ReleventDocumentAgent.address)
     print("\n ------Getting relevant transactions---------. \n")
-    with open("INFO/processed_output.json", "r") as file:
-        ftd2 = json.load(file)
+    # The first refresh loads the whole history (and may import the legacy JSON); keep it off the loop.
+    await asyncio.to_thread(transaction_snapshot.refresh)
+
+    version = transaction_snapshot.version
+    fld = await asyncio.to_thread(relevance_cache.get, message.message, version, today_scope())
+    if fld is not None:
+        print("\n ------Relevant transactions served from cache---------. \n")
+        return ReleventDocumentAgentResponse(fld=fld)
 
     print("\n ------Getting relevant transactions---------. \n")
-    flq = get_relevance(message.message)
+    flq = await get_relevance_async(message.message)
+    date_ranges = parse_date_ranges(flq)
     # fld = get_relevant_transactions(flq, message.ftd)
-    fld = get_relevant_transactions(flq,ftd2)
+    fld = get_relevant_transactions({"date_ranges": date_ranges}, transaction_snapshot.index)
+    if date_ranges:
+        # A failed or malformed LLM reply yields no ranges; do not cache that empty result.
+        await asyncio.to_thread(relevance_cache.set, message.message, fld, version, today_scope())
     print("\n ------Got relevant transactions successfully---------. \n")
-    with open("INFO/filtered_transactions.json", "w") as file:
-            json.dump(fld, file, indent=4)
+    # The caller passes fld inline to the answer and graphing agents; nothing is written to disk,
+    # so concurrent chats cannot overwrite each other's context.
     # upload_my_file("filtered_transactions.json", fld)
     
     
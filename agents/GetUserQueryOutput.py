@@ -1,4 +1,5 @@
 import json
+import asyncio
 from langchain_core.prompts import ChatPromptTemplate
 # from langchain_groq import ChatGroq
 # from langchain_huggingface import HuggingFaceEndpoint
@@ -6,7 +7,13 @@ from dotenv import load_dotenv, find_dotenv
 import os
 # from langchain_google_genai import ChatGoogleGenerativeAI
 from utils.Score_RAG_Summarizer import run
-from utils.asiChat import llmChat
+from utils.asiChat import llmChat, llmChatAsync, llmChatStream, completion_response, run_sync
+from utils.Aggregations import detect_numeric_intent, detect_side, answer_numeric, compute_facts, format_facts
+from utils.ContextBuilder import build_context, map_reduce_answer, map_reduce_prompt
+from utils.httpSideServer import start_side_server
+from aiohttp import web
+from utils.SemanticCache import SemanticCache, transactions_digest
+from utils.TransactionStore import get_store
 from uagents import Agent, Bureau, Context, Model
 from utils.DriveJSONRetriever import retrieve_data_from_gdrive
 
@@ -21,23 +28,58 @@ os.environ['LANGCHAIN_API_KEY'] = os.getenv("LANGSMITH_API_KEY")
 # os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
 
 
-def answerQuery(user_query, filtered_transactions):
+def build_answer_prompt(user_query, filtered_transactions, context=None, facts=None):
+    """
+    Returns the chat messages for answering the user query over the filtered transactions.
+    `context` is a utils.ContextBuilder.build_context result, when already computed, and
+    `facts` the utils.Aggregations.compute_facts list to include as exact figures.
+    """
     # ans = run(user_query)['content']
 
-    transactions_context = json.dumps(filtered_transactions, indent=4)
+    # CSV with normalised particulars by default; PROMPT_ENCODING=json restores the indented JSON.
+    context = context or build_context(filtered_transactions)
+    transactions_context, format_description = context["text"], context["description"]
 
     prompt_template = ChatPromptTemplate.from_messages([
-        ("system", "You are analyzing a list of financial transactions. Each transaction contains Date, Particulars, Deposit, Withdrawal, and Balance. "
+        ("system", "You are analyzing a list of financial transactions. {format} "
                 "Spendings can be observed in the Withdrawal column, while earnings can be observed in the Deposit column. "
                 "Answer the user's question based on the given transactions. Respond accurately based only on the provided data."),
-        ("user", "Transactions Data:\n{transactions}\n\nUser Query: {query}"),
+        ("user", "Precomputed facts (exact; use these instead of adding up the rows yourself):\n{facts}\n\n"
+                "Transactions Data:\n{transactions}\n\nUser Query: {query}"),
         # ("assistant", "The following contextual summary, generated by a separate summarizing agent which has an overview of whole document"
         #             "It is provided solely as background information to give answers to general financial questions. It might or might not be true."
         #             "Use this information only if it naturally supports or reinforces your answer, and do not let it override the core facts from the transactions.")
     ])
 
 
-    prompt = prompt_template.format_messages(transactions=transactions_context, query=user_query)
+    facts = facts if facts is not None else compute_facts(filtered_transactions)
+    return prompt_template.format_messages(transactions=transactions_context, format=format_description,
+                                           facts=format_facts(facts), query=user_query)
+
+
+def answer_locally(user_query, filtered_transactions):
+    """
+    Returns (response, facts). response is set when the query is a pure aggregation that
+    utils.Aggregations answers exactly, without the LLM; otherwise facts holds the
+    aggregates to put in the prompt.
+    """
+    intent = detect_numeric_intent(user_query)
+    answer = answer_numeric(intent, filtered_transactions)
+    if answer is not None:
+        print("Answered locally from aggregates:", intent)
+        return completion_response(answer), None
+    return None, compute_facts(filtered_transactions, intent)
+
+
+def answerQuery(user_query, filtered_transactions):
+    response, facts = answer_locally(user_query, filtered_transactions)
+    if response is not None:
+        return response
+    context = build_context(filtered_transactions)
+    if not context["fits"]:
+        # Too many rows for one prompt: summarise partitions concurrently, then answer.
+        return run_sync(map_reduce_answer(user_query, filtered_transactions, facts=facts))
+    prompt = build_answer_prompt(user_query, filtered_transactions, context, facts)
     # response = model.invoke(prompt)
     response = llmChat(prompt)
 
@@ -46,14 +88,73 @@ def answerQuery(user_query, filtered_transactions):
     return response
 
 
+async def answerQueryAsync(user_query, filtered_transactions):
+    """Async version of answerQuery used by the QueryAnswerAgent handler."""
+    response, facts = answer_locally(user_query, filtered_transactions)
+    if response is not None:
+        return response
+    context = build_context(filtered_transactions)
+    if not context["fits"]:
+        print(f"Context of {context['tokens']} tokens is over budget, answering with map-reduce.")
+        return await map_reduce_answer(user_query, filtered_transactions, facts=facts)
+    prompt = build_answer_prompt(user_query, filtered_transactions, context, facts)
+    response = await llmChatAsync(prompt)
+
+    # Print the response
+    print("LLM Response:", response)
+    return response
+
+
+async def answerQueryStream(user_query, filtered_transactions):
+    """
+    Streaming version of answerQueryAsync: yields the answer text as it is generated.
+    Local and map-reduce answers take the same routes; only the final call streams.
+    """
+    response, facts = answer_locally(user_query, filtered_transactions)
+    if response is not None:
+        yield json.loads(response)["choices"][0]["message"]["content"]
+        return
+    context = build_context(filtered_transactions)
+    if context["fits"]:
+        prompt = build_answer_prompt(user_query, filtered_transactions, context, facts)
+    else:
+        print(f"Context of {context['tokens']} tokens is over budget, answering with map-reduce.")
+        prompt = await map_reduce_prompt(user_query, filtered_transactions, facts=facts)
+    async for piece in llmChatStream(prompt):
+        yield piece
+
+
+def _is_completion(response):
+    """True for a well-formed completion body, so errors are not cached."""
+    try:
+        return bool(json.loads(response)["choices"][0]["message"]["content"])
+    except (json.JSONDecodeError, KeyError, IndexError, TypeError):
+        return False
+
+
 class QueryAnswerAgentMessage(Model):
     message: str
     # query : str
-    # fld : dict
+    fld: list = []  # filtered transactions returned by ReleventDocumentAgent
 
 class QueryAnswerAgentMessageResponse(Model):
     ans: str
     
+# Answers to recent queries, keyed by query meaning and the exact transactions given.
+answer_cache = SemanticCache("answer")
+
+
+def answer_scope(user_query, filtered_transactions):
+    """
+    Cache scope of an answer: the exact transactions plus the side and metric asked for,
+    so "how much did I spend" and "how much did I earn" never share an entry however
+    similar their embeddings are.
+    """
+    intent = detect_numeric_intent(user_query) or {}
+    return "|".join([transactions_digest(filtered_transactions), detect_side(user_query) or "both",
+                     intent.get("metric") or "-"])
+
+
 QueryAnswerAgent = Agent(name="QueryAnswerAgent", seed="QueryAnswerAgent recovery phrase", port=8004, mailbox=True)
 
 @QueryAnswerAgent.on_rest_post("/pest/post", QueryAnswerAgentMessage, QueryAnswerAgentMessageResponse)
@@ -64,22 +165,73 @@ async def query_answer_agent(ctx: Context , message: QueryAnswerAgentMessage) ->
     Args:
         context (Context): The context of the agent.
         sender (str): The sender of the message.
-        message (InputReaderAgentMessage): The message from the query answer agent.
+        message (QueryAnswerAgentMessage): The user query and the filtered transactions to answer it from.
     """
     
-    print("\n ------Getting relevant transactions---------. \n")
-    fld2= {}
-    with open("INFO/filtered_transactions.json", "r") as file:
-        fld2 = json.load(file)
+    fld2 = message.fld
     # fld2 = retrieve_data_from_gdrive('filtered_transactions.json')
+    version = await asyncio.to_thread(get_store().version)
+    scope = answer_scope(message.message, fld2)
+    ans = await asyncio.to_thread(answer_cache.get, message.message, version, scope)
+    if ans is not None:
+        print("\n ------Answer served from cache---------. \n")
+        return QueryAnswerAgentMessageResponse(ans=ans)
+
     print("\n ------Getting answer to the query---------. \n")
-    ans = answerQuery(message.message, fld2)
+    ans = await answerQueryAsync(message.message, fld2)
+    if _is_completion(ans):
+        await asyncio.to_thread(answer_cache.set, message.message, ans, version, scope)
     print("\n ------Got answer to the query successfully---------. \n")
     
     # await ctx.send(sender, ans)
     return QueryAnswerAgentMessageResponse(ans=ans)
 
 
+# Streaming endpoint, served next to the agent's REST port.
+ANSWER_STREAM_PORT = int(os.getenv("ANSWER_STREAM_PORT", "8014"))
+
+
+async def stream_answer(request):
+    """
+    POST /pest/stream with {"message", "fld"}: the answer as a chunked text/plain body,
+    written as the model produces it. Complete answers are cached like /pest/post.
+    """
+    body = await request.json()
+    query, fld2 = body.get("message", ""), body.get("fld") or []
+    version = await asyncio.to_thread(get_store().version)
+    scope = answer_scope(query, fld2)
+
+    response = web.StreamResponse(headers={"Content-Type": "text/plain; charset=utf-8", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+
+    ans = await asyncio.to_thread(answer_cache.get, query, version, scope)
+    if ans is not None:
+        print("\n ------Answer served from cache---------. \n")
+        await response.write(json.loads(ans)["choices"][0]["message"]["content"].encode("utf-8"))
+        await response.write_eof()
+        return response
+
+    print("\n ------Streaming answer to the query---------. \n")
+    pieces = []
+    try:
+        async for piece in answerQueryStream(query, fld2):
+            pieces.append(piece)
+            await response.write(piece.encode("utf-8"))
+    except Exception as e:
+        print("Streaming answer failed:", e)
+        await response.write(f"\n\n[Error: {e}]".encode("utf-8"))
+    else:
+        if pieces:
+            await asyncio.to_thread(answer_cache.set, query, completion_response("".join(pieces)), version, scope)
+    await response.write_eof()
+    return response
+
+
+@QueryAnswerAgent.on_event("startup")
+async def start_stream_server(ctx: Context):
+    await start_side_server([web.post("/pest/stream", stream_answer)], ANSWER_STREAM_PORT)
+
+
 if __name__ == "__main__":
     # Start the QueryAnswerAgent
     QueryAnswerAgent.run()
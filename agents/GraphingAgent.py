@@ -1,75 +1,22 @@
-import os
-import re
 import json
+import asyncio
 from typing import List
-from datetime import datetime
-from uuid import uuid4
 import pandas as pd
 from uagents import Agent, Context, Model
-from utils.asiChat import llmChat
+from utils.asiChat import llmChatAsync
+from utils.ChartEngine import SPEC_PROMPT, DEFAULT_SPECS, build_frame, parse_specs, render_specs
 from utils.DriveJSONRetriever import retrieve_data_from_gdrive
 
 
-def sanitize_graph_json(graph_json: str) -> list:
+async def generate_graphs(query: str, data) -> List[str]:
     """
-    Parses and sanitizes the graph JSON string.
-    - Removes markdown code fences if present.
-    - Strips leading/trailing whitespace.
-    - Replaces 'NaN' with 'null'.
-    - Ensures the output is a list of valid Plotly figure JSON strings.
-    - Removes any 'error' property from each trace.
-    """
-    try:
-        # Remove markdown code fences if present.
-        pattern = r"```json\s*(.*?)\s*```"
-        match = re.search(pattern, graph_json, re.DOTALL)
-        if match:
-            graph_json = match.group(1)
-        # Strip whitespace
-        graph_json = graph_json.strip()
-        # Replace NaN with null
-        graph_json = graph_json.replace("NaN", "null")
-        
-        # Try to parse the JSON.
-        parsed = json.loads(graph_json)
-        # If parsed is not a list, wrap it in a list.
-        if not isinstance(parsed, list):
-            parsed = [parsed]
-        
-        cleaned_graphs = []
-        for item in parsed:
-            # If item is a string, try parsing it
-            if isinstance(item, str):
-                try:
-                    item = json.loads(item)
-                except Exception as e:
-                    print("Error parsing inner item:", e)
-                    continue
-            # Remove invalid property 'error' from traces
-            if "data" in item and isinstance(item["data"], list):
-                for trace in item["data"]:
-                    trace.pop("error", None)
-            cleaned_graphs.append(json.dumps(item))
-        return cleaned_graphs
-    except Exception as e:
-        print("Sanitization failed:", e)
-        return []
+    Generates Plotly graphs for the user query from the filtered transactions passed in
+    by the caller (a list, or a month key -> transactions dict).
 
-
-def generate_graphs(query: str) -> List[str]:
-    """
-    Generates a Plotly graph based on the user query and processed transaction data.
-    Loads the filtered transactions from "INFO/filtered_transactions.json",
-    converts them to a DataFrame, and creates an interactive Plotly figure.
-    Returns the figure as a JSON string.
+    The LLM only chooses the charts, as small specs (see utils.ChartEngine); the figures
+    are built locally from the DataFrame, so the response size does not grow with the
+    number of transactions. Returns a list of Plotly figure JSON strings.
     """
-    data_file = "INFO/filtered_transactions.json"
-    if not os.path.exists(data_file):
-        return [json.dumps({"error": "Processed transactions file not found."})]
-    
-    with open(data_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
     # data = retrieve_data_from_gdrive('filtered_transactions.json')
     
     # Flatten transactions: if data is a list, use it directly; if it's a dict, merge all values.
@@ -85,83 +32,49 @@ def generate_graphs(query: str) -> List[str]:
     if not all_transactions:
         return [json.dumps({"error": "No transactions available."})]
     
-    # Convert to DataFrame
-    df = pd.DataFrame(all_transactions)
-    try:
-        df["Date"] = pd.to_datetime(df["Date"], format="%d-%m-%Y", errors="coerce")
-    except Exception as e:
-        print("Error converting dates:", e)
-    
-    # Prepare a prompt instructing the LLM to generate multiple Plotly graphs.
-    prompt = """
-You are a Python expert and data visualization specialist.
-Assume you have a pandas DataFrame called 'df' that contains transaction data with the following columns:
-    'Date', 'Particulars', 'Deposit', 'Withdrawal', and 'Balance'.
-Based on the user query which contains this df in list format, each transaction is a dictionary with the above keys,
-Please produce a JSON array where each element is a valid JSON string generated by calling Plotly's figure.to_json() method. 
-Each element should represent a different visualization (for example, a line chart, bar chart, pie chart, histogram, etc.) that best represents the underlying transaction data.
-IMPORTANT:
-    - Return ONLY the JSON array with no additional text, explanation, or markdown formatting.
-    - Do NOT include any extra keys such as "error" or "warning".
-    - Ensure that the output is exactly parseable by json.loads().
-    - For line charts, do not use the trace type "line". Instead, use "scatter" with "mode": "lines".
-    - Return empty JSON array if no graphs can be generated or if you can't find any transactions in query.
-Example of the expected output format:
-[
-"{\\"data\\": [...], \\"layout\\": {...}, \\"config\\": {...}}",
-"{\\"data\\": [...], \\"layout\\": {...}, \\"config\\": {...}}"
-]
-"""
-    
-    # Call LLM via llmChat. The response is expected to be a JSON array wrapped in markdown code fences.
-    response = llmChat([{"role": "system", "content": prompt}, {"role": "user", "content": query}], temperature=0.4)
-    res = json.loads(response)["choices"][0]["message"]["content"]
-    # Combine the system prompt with the user query.    
-    match = re.search(r"```json\s*(.*?)\s*```", res, re.DOTALL)
-    json_text = match.group(1) if match else res.strip()
-    
-    # # Strip any extra whitespace/newlines.
-    # json_text = json_text.strip()
-    # # Handle possible double-encoding: if the string starts and ends with a quote, unquote it.
-    # if (json_text.startswith('"') and json_text.endswith('"')):
-    #     try:
-    #         json_text = json.loads(json_text)
-    #     except Exception as e:
-    #         print("Error unquoting JSON text:", e)
-    
+    # Describe the data (not the rows) so the LLM can pick sensible charts.
+    df = build_frame(all_transactions)
+    if df.empty:
+        return [json.dumps({"error": "No transactions with valid dates."})]
+    overview = (
+        f"{len(df)} transactions from {df['Date'].min():%d-%m-%Y} to {df['Date'].max():%d-%m-%Y}, "
+        f"{df['Month'].nunique()} months, {df['Merchant'].nunique()} distinct merchants, "
+        f"{int((df['Deposit'] > 0).sum())} deposits and {int((df['Withdrawal'] > 0).sum())} withdrawals."
+    )
+
+    specs = []
     try:
-        graphs = json.loads(json_text)
-        if not isinstance(graphs, list):
-            graphs = [str(graphs)]
+        response = await llmChatAsync(
+            [{"role": "system", "content": SPEC_PROMPT},
+             {"role": "user", "content": f"{query}\n\nData overview: {overview}"}],
+            max_tokens=1000, temperature=0.2,
+        )
+        res = json.loads(response)["choices"][0]["message"]["content"]
+        specs = parse_specs(res)
     except Exception as e:
-        print("Error parsing generated graph JSON:", e)
-        graphs = [json_text]
-    
-    print("Generated graphs:", graphs)
-    
-    # Sanitize each graph JSON string.
-    sanitized_graphs = []
-    for graph_json in graphs:
-        sanitized = sanitize_graph_json(graph_json)
-        sanitized_graphs.extend(sanitized)
-        
+        print("Error getting chart specs:", e)
+    print("Chart specs:", specs)
+
+    graphs = await asyncio.to_thread(render_specs, all_transactions, specs)
+    if not graphs:
+        print("No usable chart specs, using the default charts.")
+        graphs = await asyncio.to_thread(render_specs, all_transactions, DEFAULT_SPECS)
+
     # If no graphs were generated, return an explicit error graph.
-    if not sanitized_graphs:
-        sanitized_graphs = [json.dumps({"error": "No graphs generated."})]
-    
-    print(sanitized_graphs)
+    if not graphs:
+        graphs = [json.dumps({"error": "No graphs generated."})]
     
-    return sanitized_graphs
+    return graphs
 
 # --- New Helper: prepare_graphs_response ---
-def prepare_graphs_response(query: str) -> List[str]:
+async def prepare_graphs_response(query: str, data) -> List[str]:
     """
     Generates graphs using generate_graphs(), then processes the output:
       - Parses the returned JSON array.
       - Filters out any graphs that contain an error field.
       - If no valid graphs remain, returns a list with an explicit error JSON.
     """
-    graphs = generate_graphs(query)
+    graphs = await generate_graphs(query, data)
     valid_graphs = []
     
     for graph_json in graphs:
@@ -184,6 +97,7 @@ def prepare_graphs_response(query: str) -> List[str]:
 
 class GraphingAgentMessage(Model):
     message: str
+    fld: list = []  # filtered transactions returned by ReleventDocumentAgent
 class GraphingAgentMessageResponse(Model):
     graphs: List[str]  # A list of Plotly figure JSON strings
 
@@ -197,7 +111,7 @@ async def graphing_agent(ctx: Context, message: GraphingAgentMessage) -> Graphin
     It generates a graph based on the user query and returns the graph in JSON format.
     """
     print("\n------ Generating dynamic graphs ---------\n")
-    graphs = prepare_graphs_response(message.message)
+    graphs = await prepare_graphs_response(message.message, message.fld)
     print("\n------ Generated dynamic graphs successfully ---------\n")
     return GraphingAgentMessageResponse(graphs=graphs)
 
@@ -1,4 +1,5 @@
 import json
+import asyncio
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from langchain_huggingface import HuggingFaceEndpoint
@@ -7,7 +8,8 @@ import os
 import re
 from langchain_google_genai import ChatGoogleGenerativeAI
 from uagents import Agent, Bureau, Context, Model
-from utils.asiChat import llmChat
+from utils.asiChat import llmChatAsync, completion_response
+from utils.IntentRouter import route_query, warm_up, FINANCE, CHAT
 
 
 load_dotenv(find_dotenv())
@@ -20,64 +22,53 @@ os.environ['LANGCHAIN_API_KEY'] = os.getenv("LANGSMITH_API_KEY")
 # os.environ["GOOGLE_API_KEY"] = os.getenv("GEMINI_API_KEY")
 
 
-def CheckQuery(query):
-    # Step 1: Ask if searching the financial database is needed
-    check_prompt_template = ChatPromptTemplate.from_messages([
-    ("system", 
-     "You are an AI assistant responsible for determining whether a user's query requires searching their financial transaction database.\n\n"
+# One call that both classifies and, for non-financial queries, answers. Only used
+# when utils.IntentRouter cannot decide locally.
+ROUTE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system",
+     "You are a personal finance assistant with access to the user's bank transaction database.\n\n"
      "**Rules for Answering:**\n"
-     "- If the query contains any greeting (e.g., 'Hi', 'Hello', 'How are you?', 'Good morning', etc.), respond with **'No'**.\n"
-     "- If the query asks about transactions, balances, deposits, withdrawals, dates, or any financial information, respond with **'Yes'**.\n"
-     "- Do not explain or provide any extra text—strictly return only 'Yes' or 'No'.\n"
-     "- If unsure, assume the safest answer is 'Yes'.\n\n"
-     "**Response Format:**\n"
-     "- Reply with exactly one word: **Yes** or **No** (case-insensitive).\n"
-     "- No punctuation, no explanations, no formatting—only a single word response."
+     "- If answering the query needs the user's transactions, balances, deposits, withdrawals, dates or any of their financial information, reply with exactly one word: **Yes**.\n"
+     "- If unsure, assume the safest answer is 'Yes'.\n"
+     "- Otherwise (greetings, small talk, general questions), answer the query directly in one or two lines. Never start such an answer with the word 'Yes'."
     ),
     ("user", "User Query: {query}")
-]   )
-
-    # model = HuggingFaceEndpoint(
-    #     repo_id="mistralai/Mixtral-8x7B-Instruct-v0.1",  
-    #     temperature=0.7,
-    #     max_length=200
-    # )
-#     model = ChatGoogleGenerativeAI(
-#     model="gemini-2.0-flash",
-#     temperature=0,
-#     timeout=None,
-#     max_retries=2,
-#     # other params...
-# )
-
-    check_prompt = check_prompt_template.format_messages(query=query)
-    result = llmChat(check_prompt)
-    outer_response = json.loads(result) if isinstance(result, str) else result
-    response = outer_response["choices"][0]["message"]["content"]# Clean up response
+])
 
-    print("LLM Response:", response)  # Debugging
-    print("LLM Response:", response)  # Debugging
+ANSWER_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "Answer user query in one or two line"),
+    ("user", "User Query: {query}")
+])
 
-    match = re.search(r'\b(Yes|No)\b', response, re.IGNORECASE)
-    extracted_answer = match.group(1).lower() if match else "no" 
 
-    print("Extracted Answer:", extracted_answer)  # Debugging
+async def CheckQuery(query):
+    """
+    Returns "Yes" if the query needs the transaction database, otherwise the answer
+    to it (an LLM response body, or a canned one for greetings).
+    """
+    # Step 1: Route locally (greeting / finance keywords / embedding classifier).
+    route = await asyncio.to_thread(route_query, query)  # the embedding classifier blocks
+    print("Intent route:", route["intent"], "via", route["source"])
 
-    if extracted_answer.lower() == "yes":
+    if route["intent"] == FINANCE:
+        return "Yes"
+    if route["reply"] is not None:
+        return completion_response(route["reply"])
+    if route["intent"] == CHAT:
+        return await llmChatAsync(ANSWER_PROMPT.format_messages(query=query))
+
+    # Step 2: Unsure locally, so let the LLM classify and answer in a single call.
+    result = await llmChatAsync(ROUTE_PROMPT.format_messages(query=query))
+    try:
+        response = json.loads(result)["choices"][0]["message"]["content"]
+    except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+        print("Unexpected routing response, assuming context is needed:", e)
         return "Yes"
 
-    # Step 2: If "No", ask the model to answer the query directly
-    answer_prompt_template = ChatPromptTemplate.from_messages([
-        ("system", "Answer user query in one or two line"),
-        ("user", "User Query: {query}")
-    ])
-
-    answer_prompt = answer_prompt_template.format_messages(query=query)
-    # final_response = model.invoke(answer_prompt)
-    final_response = llmChat(answer_prompt)  # Clean up response
-    print("Final Response:", final_response)  # Debugging
-
-    return final_response  # Return the actual answer
+    print("LLM Response:", response)  # Debugging
+    if re.fullmatch(r"\W*yes\W*", response.strip(), re.IGNORECASE):
+        return "Yes"
+    return result  # Return the actual answer
 
 
 class IsContextNeededAgentMessage(Model):
@@ -88,6 +79,12 @@ class IsContextNeededAgentResponse(Model):
 
 IsContextNeededAgent = Agent(name="IsContextNeededAgent", seed="IsContextNeededAgent recovery phrase", port=8000, mailbox=True)
 
+@IsContextNeededAgent.on_event("startup")
+async def load_intent_classifier(ctx: Context):
+    # Load the embedding model now rather than on the first query.
+    await asyncio.to_thread(warm_up)
+
+
 @IsContextNeededAgent.on_rest_post("/context/post", IsContextNeededAgentMessage, IsContextNeededAgentResponse)
 async def is_context_needed_agent(ctx: Context, message: IsContextNeededAgentMessage) -> IsContextNeededAgentResponse:
     """
@@ -100,7 +97,7 @@ async def is_context_needed_agent(ctx: Context, message: IsContextNeededAgentMes
     """
     
     print("\n ------Checking if context is needed---------. \n")
-    ans = CheckQuery(message.message)
+    ans = await CheckQuery(message.message)
     print("\n ------Checked if context is needed successfully---------. \n")
     
     return IsContextNeededAgentResponse(ans=ans)
@@ -6,7 +6,11 @@ import plotly.express as px
 import plotly.io as pio
 import pandas as pd
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from utils.DriveJSONRetriever import retrieve_data_from_gdrive
+from utils.TransactionStore import get_store
+from utils.Downsample import downsample_series, aggregate_by_level
 
 
 def render_response(response):
@@ -42,6 +46,56 @@ def render_response(response):
         st.write(response.text)
 
 
+@st.cache_data
+def load_months(version):
+    """Month keys in the store; `version` (TransactionStore.version()) keys the cache."""
+    return get_store().months()
+
+
+@st.cache_data
+def build_month_dashboard(month_key, version):
+    """
+    Transactions table and charts for one month, cached per (month, store version).
+    The bar, cumulative and count charts come from the daily rollups kept by the
+    store at ingest; only the balance line needs the individual transactions.
+    Returns (None, None) if the month has no transactions.
+    """
+    store = get_store()
+    transactions = store.read_month(month_key)
+    if not transactions:
+        return None, None
+    df = pd.DataFrame(transactions)
+    df["Date"] = pd.to_datetime(df["Date"], format="%d-%m-%Y")
+
+    daily = pd.DataFrame(store.read_daily_rollups(month_key))
+    daily["Date"] = pd.to_datetime(daily["Date"], format="%d-%m-%Y")
+    daily["Cumulative Deposit"] = daily["Deposit"].cumsum()
+    daily["Cumulative Withdrawal"] = daily["Withdrawal"].cumsum()
+    daily = daily.rename(columns={"Count": "Transaction Count"})
+
+    # Long ranges are reduced before plotting (LTTB for the balance curve,
+    # day/week/month buckets for the bars) so the chart payloads stay small.
+    balance_df = downsample_series(df, "Date", "Balance")
+    bars, level = aggregate_by_level(daily, "Date", ["Deposit", "Withdrawal"])
+    cumulative, _ = aggregate_by_level(daily, "Date", ["Cumulative Deposit", "Cumulative Withdrawal"], how="last")
+    counts, _ = aggregate_by_level(daily, "Date", ["Transaction Count"])
+    figures = {
+        "balance": px.line(balance_df, x="Date", y="Balance", title="Balance Trend", markers=True),
+        "bar": px.bar(bars, x="Date", y=["Deposit", "Withdrawal"],
+                      title=f"Deposits & Withdrawals per {level}", barmode="group"),
+        "area": px.area(cumulative, x="Date", y=["Cumulative Deposit", "Cumulative Withdrawal"],
+                        title="Cumulative Deposits vs Withdrawals"),
+        "count": px.bar(counts, x="Date", y="Transaction Count", title=f"Transactions Per {level.title()}"),
+    }
+    return df, figures
+
+
+# Batch ingest endpoints of the parse agent
+PARSE_BATCH_URL = "http://0.0.0.0:8002/parse/batch"
+PARSE_STATUS_URL = "http://0.0.0.0:8002/parse/status"
+PARSE_POLL_SECONDS = 1.0
+
+
 # Create the directory if it doesn't exist
 DATA_DIR = "INFO/data"
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -86,76 +140,68 @@ def upload_page():
 
     if st.button("🔄 Add File Data"):
         if "uploaded_filenames" in st.session_state:
-            responses = []
-            # Loop over each filename and send an individual call
-            for fname in st.session_state["uploaded_filenames"]:
-                response = requests.post(
-                    "http://0.0.0.0:8002/parse",
-                    json={"message": fname}
-                )
-                responses.append(response.json())
-            st.write("Responses:")
-            st.write(responses)
-            st.write("📌 Button clicked!")
+            # All files go in one batch; the parse agent queues them as background jobs,
+            # processes them concurrently and reports per-file progress, which is polled here.
+            response = requests.post(PARSE_BATCH_URL, json={"messages": st.session_state["uploaded_filenames"]})
+            batch_id = response.json()["batch_id"]
+            progress_bar = st.progress(0.0, text="Starting ingest...")
+            status_table = st.empty()
+            while True:
+                status = requests.post(PARSE_STATUS_URL, json={"batch_id": batch_id}).json()
+                total = max(status["total"], 1)
+                progress_bar.progress(status["done"] / total, text=f"Processed {status['done']} of {status['total']} files")
+                status_table.dataframe(pd.DataFrame(status["files"]))
+                if status["finished"]:
+                    break
+                time.sleep(PARSE_POLL_SECONDS)
+            failed = [f"{f['file']} ({f['error']})" for f in status["files"] if f.get("status") == "failed"]
+            partial = [f"{f['file']} ({f['error']})" for f in status["files"] if f.get("status") == "partial"]
+            if failed:
+                st.error(f"Failed to ingest: {', '.join(failed)}")
+            if partial:
+                st.warning(f"⚠️ Partly ingested: {', '.join(partial)}")
+            if not failed and not partial:
+                st.success("✅ All files ingested.")
         else:
             st.warning("⚠️ Please upload file(s) before clicking 'Add File Data'.")
 
     ### 🔹 Section 2: Show Graphs for Transactions
     st.header("📊 Transaction Analytics")
 
-    json_path = "INFO/processed_output.json"
+    store = get_store()
+    version = store.version()
+    pdf_names = load_months(version)
 
-    if os.path.exists(json_path):
-        with open(json_path, "r") as f:
-            data = json.load(f)  # Load JSON file
+    if pdf_names:
         # data = retrieve_data_from_gdrive('processed_output.json')
 
         # Show dropdown to select a file (Month)
-        pdf_names = list(data.keys())
         selected_pdf = st.selectbox("📅 Select a Month:", pdf_names)
 
-        if selected_pdf in data:
-            transactions = data[selected_pdf]  # Get transactions for selected PDF
-
-            if transactions:
-                df = pd.DataFrame(transactions)  # Convert to DataFrame
-                df["Date"] = pd.to_datetime(df["Date"], format="%d-%m-%Y")
+        if selected_pdf:
+            # Cached per (month, store version): switching months does not re-read the store.
+            df, figures = build_month_dashboard(selected_pdf, version)
 
+            if df is not None:
                 # Show Raw Data
                 st.subheader("📜 Transaction Data")
                 st.dataframe(df)
 
                 # 1️⃣ Line Chart: Balance Over Time
                 st.subheader("📈 Balance Over Time")
-                fig_balance = px.line(df, x="Date", y="Balance", title="Balance Trend", markers=True)
-                st.plotly_chart(fig_balance)
+                st.plotly_chart(figures["balance"])
 
                 # 2️⃣ Bar Chart: Deposit vs Withdrawal
                 st.subheader("💰 Deposit vs Withdrawal")
-                df["Deposit"] = df["Deposit"].fillna(0)
-                df["Withdrawal"] = df["Withdrawal"].fillna(0)
-
-                fig_bar = px.bar(df, x="Date", y=["Deposit", "Withdrawal"], 
-                                    title="Deposits & Withdrawals", 
-                                    barmode="group")
-                st.plotly_chart(fig_bar)
+                st.plotly_chart(figures["bar"])
 
                 # 3️⃣ Area Chart: Cumulative Deposits & Withdrawals
                 st.subheader("📊 Cumulative Deposits & Withdrawals")
-                df["Cumulative Deposit"] = df["Deposit"].cumsum()
-                df["Cumulative Withdrawal"] = df["Withdrawal"].cumsum()
-
-                fig_area = px.area(df, x="Date", y=["Cumulative Deposit", "Cumulative Withdrawal"],
-                                    title="Cumulative Deposits vs Withdrawals")
-                st.plotly_chart(fig_area)
+                st.plotly_chart(figures["area"])
 
                 # 4️⃣ Histogram: Transactions Per Day
                 st.subheader("📊 Daily Transaction Count")
-                df["Transaction Count"] = 1  
-
-                fig_hist = px.histogram(df, x="Date", y="Transaction Count", 
-                                        title="Transactions Per Day", nbins=len(df["Date"].unique()))
-                st.plotly_chart(fig_hist)
+                st.plotly_chart(figures["count"])
 
             else:
                 st.warning(f"⚠️ No transactions found for '{selected_pdf}'.")
@@ -203,6 +249,79 @@ def upload_page():
     #     else:
     #         st.warning("Please enter a query before clicking the button.")
 
+# Agent endpoints used by the chat pipeline
+CONTEXT_URL = "http://0.0.0.0:8000/context/post"
+RELEVANCE_URL = "http://0.0.0.0:8003/rest/post"
+ANSWER_URL = "http://0.0.0.0:8004/pest/post"
+ANSWER_STREAM_URL = "http://0.0.0.0:8014/pest/stream"
+GRAPH_URL = "http://0.0.0.0:8001/graph"
+
+@st.cache_resource
+def get_chat_executor():
+    """
+    Worker threads for running agent calls concurrently (only HTTP calls run here;
+    all Streamlit rendering stays on the script thread). Created once per process,
+    not on every rerun of the script.
+    """
+    return ThreadPoolExecutor(max_workers=8)
+
+
+chat_executor = get_chat_executor()
+
+
+def post_message(url, message, **fields):
+    return requests.post(url, json={"message": message, **fields})
+
+
+def render_streamed_answer(query, fld):
+    """
+    Render the answer from the answer agent's streaming endpoint as it arrives.
+    Falls back to /pest/post if the streaming endpoint is unavailable.
+    """
+    try:
+        response = requests.post(ANSWER_STREAM_URL, json={"message": query, "fld": fld}, stream=True)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print("Streaming unavailable, falling back to /pest/post:", e)
+        return render_response(post_message(ANSWER_URL, query, fld=fld))
+
+    response.encoding = "utf-8"
+    st.markdown("### Final Answer")
+    with response:
+        return st.write_stream(
+            piece for piece in response.iter_content(chunk_size=None, decode_unicode=True) if piece
+        )
+
+
+def render_graphs(graph_response):
+    """Render the list of Plotly figure JSON strings returned by the graphing agent."""
+    try:
+        graph_data = graph_response.json()
+    except Exception as e:
+        st.error("Error parsing graph response: " + str(e))
+        return
+    if "graphs" in graph_data:
+        graphs_list = graph_data["graphs"]
+        if not isinstance(graphs_list, list):
+            graphs_list = [graphs_list]
+        st.write(f"Generated {len(graphs_list)} graphs:")
+        for i, graph_json in enumerate(graphs_list):
+            try:
+                # Try to parse the graph JSON string
+                parsed_graph = json.loads(graph_json)
+                # If it's an error message, display it and skip rendering.
+                if isinstance(parsed_graph, dict) and "error" in parsed_graph:
+                    st.error(f"Graph {i+1} error: {parsed_graph['error']}")
+                    continue
+                # # Otherwise, try to render the figure.
+                fig = pio.from_json(graph_json)
+                st.plotly_chart(fig)
+            except Exception as e:
+                st.error(f"Error rendering graph {i+1}: {e}")
+    else:
+        st.error("Graph data not found in response.")
+
+
 def chat_page():
     """Page for chatting with your Finance Agent"""
     st.title("Chat with your Finance Agent")
@@ -220,55 +339,41 @@ def chat_page():
 
     if st.button("Get Answer"):
         if query:
+            # Start the context check and, speculatively, the relevance extraction at the
+            # same time; the relevance result is discarded if no context is needed.
+            context_future = chat_executor.submit(post_message, CONTEXT_URL, query)
+            relevance_future = chat_executor.submit(post_message, RELEVANCE_URL, query)
+
             # Get context: returns "Yes" or "No"
-            response00 = requests.post("http://0.0.0.0:8000/context/post", json={"message": query})
+            response00 = context_future.result()
             context_ans = response00.json().get("ans")
+            graph_future = None
             
             if context_ans.lower() == "yes":
-                # Call endpoints for the refined answer
-                # (Assuming /rest/post and /pest/post are both used; adjust as needed)
-                response0 = requests.post("http://0.0.0.0:8003/rest/post", json={"message": query})
-                response = requests.post("http://0.0.0.0:8004/pest/post", json={"message": query})
-                
-                answer_text = render_response(response)
-            else:
-                answer_text = render_response(response00)
-            
-            # If we received a valid chat answer, send it to the graphing agent.
-            if answer_text:
+                # Once the filtered transactions exist, the answer and the graphs
+                # can be generated in parallel.
+                response0 = relevance_future.result()
+                fld = response0.json().get("fld") or []
                 if visualize:
-                    st.info("Generating graphs...")
                     graph_message = (
                         f"User Query: {query}\n"
-                        f"Chat Answer: {answer_text}\n"
                         "Generate multiple relevant graphs (e.g., line charts, bar charts, pie charts, histograms) that best represent the underlying transaction data."
                     )
-                    graph_response = requests.post("http://0.0.0.0:8001/graph", json={"message": graph_message})
-                    try:
-                        graph_data = graph_response.json()
-                    except Exception as e:
-                        st.error("Error parsing graph response: " + str(e))
-                        return
-                    if "graphs" in graph_data:
-                        graphs_list = graph_data["graphs"]
-                        if not isinstance(graphs_list, list):
-                            graphs_list = [graphs_list]
-                        st.write(f"Generated {len(graphs_list)} graphs:")
-                        for i, graph_json in enumerate(graphs_list):
-                            try:
-                                # Try to parse the graph JSON string
-                                parsed_graph = json.loads(graph_json)
-                                # If it's an error message, display it and skip rendering.
-                                if isinstance(parsed_graph, dict) and "error" in parsed_graph:
-                                    st.error(f"Graph {i+1} error: {parsed_graph['error']}")
-                                    continue
-                                # # Otherwise, try to render the figure.
-                                fig = pio.from_json(graph_json)
-                                st.plotly_chart(fig)
-                            except Exception as e:
-                                st.error(f"Error rendering graph {i+1}: {e}")
-                    else:
-                        st.error("Graph data not found in response.")
+                    graph_future = chat_executor.submit(post_message, GRAPH_URL, graph_message, fld=fld)
+                # Tokens are shown as they arrive; the graphs keep generating meanwhile.
+                answer_text = render_streamed_answer(query, fld)
+            else:
+                relevance_future.cancel()  # no-op if already running; its result is ignored
+                answer_text = render_response(response00)
+            
+            # If we received a valid chat answer, show the graphs for it.
+            if answer_text:
+                if visualize and graph_future is None:
+                    # The graphing agent draws the fetched transactions; none were needed here.
+                    st.info("This answer did not use your transactions, so there is nothing to graph.")
+                elif visualize:
+                    st.info("Generating graphs...")
+                    render_graphs(graph_future.result())
                 else:
                     st.info("Graph visualization disabled.")
                     
@@ -6,18 +6,24 @@ import seaborn as sns
 from datetime import datetime
 import matplotlib.dates as mdates
 from utils.DriveJSONRetriever import retrieve_data_from_gdrive
+from utils.TransactionStore import get_store
+from utils.Downsample import downsample_series, aggregate_by_level
 
 
 # Use a Seaborn style for a polished look
 sns.set(style="whitegrid")
 plt.rcParams.update({'figure.figsize': (12, 6), 'axes.titlesize': 16, 'axes.labelsize': 14})
 
-def load_data(json_file):
-    if not os.path.exists(json_file):
-        raise FileNotFoundError(f"File not found: {json_file}. Please check the file path and name.")
-    
-    with open(json_file, 'r') as f:
-        data = json.load(f)
+def load_data(json_file=None):
+    """Load transactions from the transaction store, or from a legacy JSON export if a path is given."""
+    if json_file is None:
+        data = get_store().read_all()
+    else:
+        if not os.path.exists(json_file):
+            raise FileNotFoundError(f"File not found: {json_file}. Please check the file path and name.")
+
+        with open(json_file, 'r') as f:
+            data = json.load(f)
     # data = retrieve_data_from_gdrive('processed_output.json')
     
     records = []
@@ -47,7 +53,7 @@ def adjust_xticks(ax):
     plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
 
 def plot_balance_over_time(df):
-    df_sorted = df.sort_values('Date')
+    df_sorted = downsample_series(df, 'Date', 'Balance')
     fig, ax = plt.subplots()
     sns.lineplot(data=df_sorted, x='Date', y='Balance', marker='o', label="Balance", ax=ax)
     ax.set_title("Account Balance Over Time")
@@ -58,10 +64,10 @@ def plot_balance_over_time(df):
     fig.savefig("INFO/staticPlots/balance_over_time.png")
 
 def plot_deposits_over_time(df):
-    df_deposits = df.dropna(subset=['Deposit']).sort_values('Date')
+    df_deposits, level = aggregate_by_level(df.dropna(subset=['Deposit']), 'Date', ['Deposit'])
     fig, ax = plt.subplots()
     sns.barplot(data=df_deposits, x='Date', y='Deposit', color='green', ax=ax)
-    ax.set_title("Deposits Over Time")
+    ax.set_title(f"Deposits Over Time (per {level})")
     ax.set_xlabel("Date")
     ax.set_ylabel("Deposit Amount")
     adjust_xticks(ax)
@@ -69,11 +75,10 @@ def plot_deposits_over_time(df):
     fig.savefig("INFO/staticPlots/deposits_over_time.png")
 
 def plot_transactions_per_day(df):
-    df['TransactionCount'] = 1
-    daily_counts = df.groupby('Date')['TransactionCount'].sum().reset_index()
+    daily_counts, level = aggregate_by_level(df, 'Date', ['TransactionCount'], how='count')
     fig, ax = plt.subplots()
-    sns.barplot(data=daily_counts.sort_values('Date'), x='Date', y='TransactionCount', palette='Blues_d', ax=ax)
-    ax.set_title("Number of Transactions Per Day")
+    sns.barplot(data=daily_counts, x='Date', y='TransactionCount', palette='Blues_d', ax=ax)
+    ax.set_title(f"Number of Transactions Per {level.title()}")
     ax.set_xlabel("Date")
     ax.set_ylabel("Transaction Count")
     adjust_xticks(ax)
@@ -111,6 +116,7 @@ def plot_deposit_vs_withdrawal(df):
 def plot_cumulative_net(df):
     df_sorted = df.sort_values('Date')
     df_sorted['CumulativeNet'] = df_sorted['Net'].cumsum()
+    df_sorted = downsample_series(df_sorted, 'Date', 'CumulativeNet')
     fig, ax = plt.subplots()
     sns.lineplot(data=df_sorted, x='Date', y='CumulativeNet', marker='o', color='purple', ax=ax)
     ax.set_title("Cumulative Net Deposits Over Time")
@@ -123,6 +129,7 @@ def plot_cumulative_net(df):
 def plot_balance_moving_average(df, window=3):
     df_sorted = df.sort_values('Date')
     df_sorted['Balance_MA'] = df_sorted['Balance'].rolling(window=window).mean()
+    df_sorted = downsample_series(df_sorted, 'Date', 'Balance')
     fig, ax = plt.subplots()
     sns.lineplot(data=df_sorted, x='Date', y='Balance', marker='o', label="Balance", ax=ax)
     sns.lineplot(data=df_sorted, x='Date', y='Balance_MA', marker='o', color='orange', label=f'{window}-Day MA', ax=ax)
@@ -137,8 +144,8 @@ def plot_balance_moving_average(df, window=3):
 def plot_deposits_withdrawals_time_series(df):
     df_sorted = df.sort_values('Date')
     fig, ax = plt.subplots()
-    sns.lineplot(data=df_sorted, x='Date', y='Deposit', marker='o', label="Deposits", color='green', ax=ax)
-    sns.lineplot(data=df_sorted, x='Date', y='Withdrawal', marker='o', label="Withdrawals", color='red', ax=ax)
+    sns.lineplot(data=downsample_series(df_sorted, 'Date', 'Deposit'), x='Date', y='Deposit', marker='o', label="Deposits", color='green', ax=ax)
+    sns.lineplot(data=downsample_series(df_sorted, 'Date', 'Withdrawal'), x='Date', y='Withdrawal', marker='o', label="Withdrawals", color='red', ax=ax)
     ax.set_title("Deposits & Withdrawals Over Time")
     ax.set_xlabel("Date")
     ax.set_ylabel("Amount")
@@ -171,10 +178,10 @@ def plot_boxplot_deposit_by_weekday(df):
     fig.savefig("INFO/staticPlots/boxplot_deposit_by_weekday.png")
 
 def plot_daily_net_transactions(df):
-    daily_net = df.groupby('Date')['Net'].sum().reset_index()
+    daily_net, level = aggregate_by_level(df, 'Date', ['Net'])
     fig, ax = plt.subplots()
-    sns.barplot(data=daily_net.sort_values('Date'), x='Date', y='Net', palette='coolwarm', ax=ax)
-    ax.set_title("Daily Net Transactions")
+    sns.barplot(data=daily_net, x='Date', y='Net', palette='coolwarm', ax=ax)
+    ax.set_title(f"Net Transactions Per {level.title()}")
     ax.set_xlabel("Date")
     ax.set_ylabel("Net Amount (Deposit - Withdrawal)")
     adjust_xticks(ax)
@@ -191,8 +198,7 @@ def plot_numeric_correlation_heatmap(df):
     fig.savefig("INFO/staticPlots/correlation_heatmap.png")
 
 def main():
-    json_file = "./INFO/processed_output.json"  # Ensure this file exists!
-    df = load_data(json_file)
+    df = load_data()
     
     # Original plots
     plot_balance_over_time(df)
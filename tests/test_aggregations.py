@@ -0,0 +1,52 @@
+import pytest
+from utils.Aggregations import detect_numeric_intent, answer_numeric, is_pure_question
+
+TRANSACTIONS = [
+    {"Date": "02-03-2025", "Particulars": "UPI/DR/1234/MOM/SBIN", "Deposit": 5000.0, "Withdrawal": None, "Balance": 15000.0},
+    {"Date": "05-03-2025", "Particulars": "UPI/DR/5678/SWIGGY/HDFC", "Deposit": None, "Withdrawal": 450.0, "Balance": 14550.0},
+    {"Date": "12-04-2025", "Particulars": "NEFT SALARY ACME", "Deposit": 50000.0, "Withdrawal": None, "Balance": 64550.0},
+    {"Date": "20-04-2025", "Particulars": "UPI/DR/9012/AMAZON/ICIC", "Deposit": None, "Withdrawal": 2300.0, "Balance": 62250.0},
+]
+
+
+@pytest.mark.parametrize("query", [
+    "how much did I receive from mom",
+    "Is my balance lower than last month",
+    "how much did I spend in march vs april",
+    "how much money do I have left",
+    "how much did I spend last week and what was it on",
+    "how much did I spend on swiggy",
+    "compare my spending in march and april",
+    "did I spend more in april",
+    "how much was paid by me to amazon",
+])
+def test_compound_or_filtered_questions_go_to_the_llm(query):
+    intent = detect_numeric_intent(query)
+    assert intent is None or not intent["pure"]
+    assert answer_numeric(intent, TRANSACTIONS) is None
+
+
+@pytest.mark.parametrize("query", [
+    "how much did I spend in March?",
+    "In March, how much did I earn",
+    "What is my current balance",
+    "how many transactions were there last month",
+    "top 3 withdrawals",
+    "total deposits in 2025",
+    "spending by month",
+    "who did I pay the most",
+    "average withdrawal in Q2 2025",
+])
+def test_single_clause_questions_are_pure(query):
+    assert is_pure_question(query)
+    assert detect_numeric_intent(query)["pure"]
+
+
+def test_pure_sum_is_answered_exactly():
+    answer = answer_numeric(detect_numeric_intent("how much did I spend"), TRANSACTIONS)
+    assert "₹2,750.00" in answer
+
+
+def test_pure_balance_is_the_latest_balance():
+    answer = answer_numeric(detect_numeric_intent("what is my balance"), TRANSACTIONS)
+    assert "₹62,250.00" in answer
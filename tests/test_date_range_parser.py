@@ -0,0 +1,49 @@
+from datetime import date
+import pytest
+from utils.DateRangeParser import parse_date_ranges_locally, DATE_PARSER_MIN_CONFIDENCE
+
+TODAY = date(2026, 10, 18)
+
+
+def ranges(query):
+    date_ranges, confidence = parse_date_ranges_locally(query, today=TODAY)
+    return [(r["start"], r["end"]) for r in date_ranges], confidence
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("spending in Q2 last year", [("01-04-2025", "30-06-2025")]),
+    ("first quarter of last year", [("01-01-2025", "31-03-2025")]),
+    ("Q3 this year", [("01-07-2026", "30-09-2026")]),
+    ("second quarter of the previous year", [("01-04-2025", "30-06-2025")]),
+    ("Q1 2024", [("01-01-2024", "31-03-2024")]),
+])
+def test_quarter_with_year_modifier(query, expected):
+    assert ranges(query) == (expected, 1.0)
+
+
+def test_bare_quarter_is_most_recent():
+    assert ranges("Q1") == ([("01-01-2026", "31-03-2026")], 1.0)
+
+
+def test_month_with_year_modifier():
+    assert ranges("March last year") == ([("01-03-2025", "31-03-2025")], 1.0)
+
+
+def test_overlapping_ranges_of_different_size_need_the_llm():
+    date_ranges, confidence = ranges("March 2025 in 2025")
+    assert len(date_ranges) == 2
+    assert confidence < DATE_PARSER_MIN_CONFIDENCE
+
+
+def test_separate_ranges_keep_full_confidence():
+    assert ranges("march 2025 and april 2025")[1] == 1.0
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("spending before march", [("01-01-1999", "28-02-2025")]),
+    ("transactions before 5th March", [("01-01-1999", "04-03-2025")]),
+    ("transactions until 5th March", [("01-01-1999", "05-03-2025")]),
+])
+def test_before_excludes_the_date(query, expected):
+    date_ranges, confidence = parse_date_ranges_locally(query, today=date(2025, 4, 15))
+    assert [(r["start"], r["end"]) for r in date_ranges] == expected
@@ -0,0 +1,16 @@
+from utils.SemanticCache import SemanticCache
+
+QUERY = "how much money in total I ended up paying to {} over the course of march"
+
+
+def test_payee_names_never_share_an_entry():
+    cache = SemanticCache("test", enabled=True)
+    cache.set(QUERY.format("rahul"), "rahul's total", version=1)
+    assert cache.get(QUERY.format("rohan"), version=1) is None
+    assert cache.get(QUERY.format("rahul"), version=1) == "rahul's total"
+
+
+def test_rephrased_question_reuses_the_entry():
+    cache = SemanticCache("test", threshold=0.5, enabled=True)
+    cache.set("how much did I spend in March", "answer", version=1)
+    assert cache.get("How much have I spent in March?", version=1) == "answer"
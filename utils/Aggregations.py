@@ -0,0 +1,248 @@
+import re
+import pandas as pd
+from utils.PromptEncoder import normalise_particulars
+from utils.DateRangeParser import MONTH
+
+# How many merchants / transactions the "top" facts list.
+TOP_K = 5
+
+SPEND_PATTERN = re.compile(r"\b(spen[dt]|spending|expens\w*|withdr[ae]w\w*|debit\w*|paid|pay|outflow|cost)\b")
+EARN_PATTERN = re.compile(r"\b(earn\w*|income|deposit\w*|credit\w*|receiv\w*|salary|inflow|got paid)\b")
+METRIC_PATTERNS = [
+    ("count", re.compile(r"\b(how many|number of|count)\b")),
+    ("max", re.compile(r"\b(largest|biggest|highest|maximum|max|most expensive|costliest|top)\b")),
+    ("min", re.compile(r"\b(smallest|lowest|minimum|min|cheapest)\b")),
+    ("avg", re.compile(r"\b(average|avg|mean)\b")),
+    ("balance", re.compile(r"\b(balance)\b")),
+    ("sum", re.compile(r"\b(how much|total|sum|overall|net)\b")),
+]
+GROUP_PATTERNS = [
+    ("day", re.compile(r"\b(per day|daily|each day|by day|day[- ]wise)\b")),
+    ("week", re.compile(r"\b(per week|weekly|each week|by week|week[- ]wise)\b")),
+    ("month", re.compile(r"\b(per month|monthly|each month|by month|month[- ]wise)\b")),
+    ("merchant", re.compile(r"\b(per|by|each|which|top|most)\s+(merchant|payee|vendor|shop|person|people)s?\b|\bwho did i (pay|send)\b")),
+]
+TOP_K_PATTERN = re.compile(r"\btop\s+(\d{1,2})\b")
+
+# Only a closed set of single-clause questions is answered without the LLM ("pure");
+# anything else (a payee, a comparison, a second clause) gets the facts in the prompt.
+# Words that always mean more than a plain aggregation:
+NOT_PURE_PATTERN = re.compile(
+    r"\b(from|by(?!\s+(?:day|week|month|merchant|payee)s?\b)|than|vs|versus|compar\w*|more|less|left|and|or|but|"
+    r"why|should|explain)\b"
+)
+# One period phrase, before or after the question ("in March", "last month", "Q2 2025").
+PERIOD = (
+    rf"(?:(?:in|during|for|over|since|on)\s+)?(?:the\s+)?(?:"
+    rf"(?:this|current|last|previous|past)\s+(?:\d{{1,3}}\s+)?(?:days?|weeks?|months?|quarters?|years?)|today|yesterday|"
+    rf"q[1-4](?:\s+(?:19|20)\d{{2}})?|(?:(?:this|last)\s+)?{MONTH}(?:\s+(?:19|20)\d{{2}})?|(?:19|20)\d{{2}}|"
+    rf"since (?:i|we) started|all[- ]time|ever)"
+)
+SPEND_VERB = r"(?:spend|spent|pay|paid|withdraw|withdrawn|withdrew)"
+EARN_VERB = r"(?:earn|earned|receive|received|deposit|deposited|get|got)"
+SIDE_NOUN = r"(?:spending|spends?|expenses?|expenditure|withdrawals?|deposits?|income|earnings|payments?|transactions?|debits?|credits?)"
+ROW_NOUN = r"(?:transactions?|withdrawals?|deposits?|payments?|expenses?|purchases?|debits?|credits?|spends?)"
+ASK = r"(?:(?:what(?:'s| is| was| were| are)|show(?: me)?|give me|tell me|list)\s+)?(?:my\s+|the\s+)?"
+PURE_FORMS = [
+    rf"how much (?:money )?(?:did|have|do) i (?:{SPEND_VERB}|{EARN_VERB})(?: in total| overall| altogether)?",
+    rf"{ASK}(?:total|overall|net) (?:amount )?{SIDE_NOUN}",
+    rf"how many {ROW_NOUN}(?: (?:did|have|do) i (?:make|made|do|did|have|had)| were there| are there)?",
+    rf"{ASK}(?:number|count) of {ROW_NOUN}",
+    rf"{ASK}(?:single )?(?:largest|biggest|highest|maximum|max|smallest|lowest|minimum|min|most expensive|costliest|cheapest) (?:single )?{ROW_NOUN}",
+    rf"{ASK}top \d{{1,2}} (?:{ROW_NOUN}|merchants|payees|vendors)",
+    rf"{ASK}average {SIDE_NOUN}",
+    rf"{ASK}(?:current |closing |latest |final )?balance",
+    rf"{ASK}{SIDE_NOUN} (?:per|by|each) (?:day|week|month|merchant|payee)",
+    rf"{ASK}(?:daily|weekly|monthly|day[- ]wise|week[- ]wise|month[- ]wise) {SIDE_NOUN}",
+    rf"how much (?:did|have|do) i (?:{SPEND_VERB}|{EARN_VERB}) (?:per|each|every) (?:day|week|month)",
+    r"(?:who|which (?:merchants?|payees?|vendors?)) did i (?:pay|spend|send money to)(?: the)? most(?: on| to)?",
+]
+PURE_PATTERN = re.compile(rf"^(?:{PERIOD}\s+)?(?:{'|'.join(PURE_FORMS)})(?:\s+{PERIOD})?$")
+
+
+def is_pure_question(query):
+    """True if the query is one of PURE_FORMS, i.e. its answer is a single aggregate."""
+    q = " ".join(re.sub(r"[?.!,]+", " ", query.lower()).split())
+    q = re.sub(r"^(?:please|can you|could you)\s+", "", q)
+    return not NOT_PURE_PATTERN.search(q) and bool(PURE_PATTERN.match(q))
+
+def to_frame(transactions):
+    """Transactions as a DataFrame with parsed dates, float amounts and a merchant column."""
+    df = pd.DataFrame(list(transactions), columns=["Date", "Particulars", "Deposit", "Withdrawal", "Balance"])
+    df["Date"] = pd.to_datetime(df["Date"], format="%d-%m-%Y", errors="coerce")
+    for col in ("Deposit", "Withdrawal", "Balance"):
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df[["Deposit", "Withdrawal"]] = df[["Deposit", "Withdrawal"]].fillna(0.0)
+    df["Merchant"] = df["Particulars"].map(normalise_particulars)
+    return df.dropna(subset=["Date"]).reset_index(drop=True)
+
+
+def detect_side(query):
+    """"withdrawal" for questions about spending, "deposit" for earnings, None for both or neither."""
+    q = query.lower()
+    spend, earn = bool(SPEND_PATTERN.search(q)), bool(EARN_PATTERN.search(q))
+    return "withdrawal" if spend and not earn else "deposit" if earn and not spend else None
+
+
+def detect_numeric_intent(query):
+    """
+    Recognise questions that are an aggregation over the filtered transactions.
+
+    Returns None, or {"metric", "side", "group", "top_k", "ranked", "pure"} where metric is
+    one of sum/count/max/min/avg/balance, side is "withdrawal", "deposit" or None (both),
+    group is day/week/month/merchant or None, ranked is set for "top N" questions, and pure
+    means the question can be answered from the numbers alone, without the LLM (see
+    is_pure_question).
+    """
+    q = query.lower()
+    metric = next((name for name, pattern in METRIC_PATTERNS if pattern.search(q)), None)
+    group = next((name for name, pattern in GROUP_PATTERNS if pattern.search(q)), None)
+    if metric is None and group is None:
+        return None
+    side = detect_side(q)
+    top_k = TOP_K_PATTERN.search(q)
+    pure = is_pure_question(q)
+    return {
+        "metric": metric or "sum",
+        "side": side,
+        "group": group,
+        "top_k": int(top_k.group(1)) if top_k else TOP_K,
+        "ranked": top_k is not None,
+        "pure": pure,
+    }
+
+
+def _money(value):
+    return f"₹{value:,.2f}"
+
+
+def _row(row):
+    side = "deposit" if row["Deposit"] else "withdrawal"
+    amount = row["Deposit"] or row["Withdrawal"]
+    return f"{_money(amount)} {side} on {row['Date']:%d-%m-%Y} ({row['Merchant']})"
+
+
+def _grouped(df, group, column):
+    if group == "merchant":
+        keys = df["Merchant"]
+    elif group == "day":
+        keys = df["Date"].dt.strftime("%d-%m-%Y")
+    elif group == "week":
+        keys = df["Date"].dt.to_period("W-SUN").dt.start_time.dt.strftime("week of %d-%m-%Y")
+    else:
+        keys = df["Date"].dt.to_period("M").dt.strftime("%b-%y")
+    grouped = df.groupby(keys, sort=False)[column].agg(["sum", "count"])
+    if group == "merchant":
+        grouped = grouped.sort_values("sum", ascending=False)
+    return grouped
+
+
+def compute_facts(transactions, intent=None):
+    """
+    Exact aggregates over the transactions, as a list of short fact strings: counts,
+    totals, net flow, opening/closing balance, the largest rows, spend by month, the
+    top merchants, and the group-by the question asked for.
+    """
+    df = to_frame(transactions)
+    if df.empty:
+        return ["There are no transactions in the selected period."]
+    intent = intent or {}
+    top_k = intent.get("top_k", TOP_K)
+    deposits, withdrawals = df[df["Deposit"] > 0], df[df["Withdrawal"] > 0]
+
+    facts = [
+        f"Period covered: {df['Date'].min():%d-%m-%Y} to {df['Date'].max():%d-%m-%Y}.",
+        f"Transactions: {len(df)} ({len(deposits)} deposits, {len(withdrawals)} withdrawals).",
+        f"Total deposits: {_money(deposits['Deposit'].sum())}. Total withdrawals: {_money(withdrawals['Withdrawal'].sum())}. "
+        f"Net: {_money(df['Deposit'].sum() - df['Withdrawal'].sum())}.",
+    ]
+    balances = df.sort_values("Date", kind="stable")["Balance"].dropna()
+    if not balances.empty:
+        facts.append(f"Balance after the first transaction: {_money(balances.iloc[0])}; after the last: {_money(balances.iloc[-1])}.")
+    if not withdrawals.empty:
+        facts.append(f"Average withdrawal: {_money(withdrawals['Withdrawal'].mean())}.")
+        largest = withdrawals.nlargest(top_k, "Withdrawal")
+        facts.append("Largest withdrawals: " + "; ".join(_row(r) for _, r in largest.iterrows()) + ".")
+    if not deposits.empty:
+        facts.append(f"Average deposit: {_money(deposits['Deposit'].mean())}.")
+        largest = deposits.nlargest(top_k, "Deposit")
+        facts.append("Largest deposits: " + "; ".join(_row(r) for _, r in largest.iterrows()) + ".")
+
+    months = _grouped(df, "month", "Withdrawal")
+    if len(months) > 1:
+        facts.append("Withdrawals by month: " + "; ".join(f"{k} {_money(v['sum'])}" for k, v in months.iterrows()) + ".")
+    if not withdrawals.empty:
+        merchants = _grouped(withdrawals, "merchant", "Withdrawal").head(top_k)
+        facts.append("Top payees by amount paid: " + "; ".join(
+            f"{k} {_money(v['sum'])} over {int(v['count'])} payments" for k, v in merchants.iterrows()) + ".")
+
+    group = intent.get("group")
+    if group in ("day", "week"):
+        column = "Deposit" if intent.get("side") == "deposit" else "Withdrawal"
+        rows = _grouped(df[df[column] > 0], group, column)
+        facts.append(f"{column}s per {group}: " + "; ".join(f"{k} {_money(v['sum'])}" for k, v in rows.iterrows()) + ".")
+    return facts
+
+
+def format_facts(facts):
+    return "\n".join(f"- {fact}" for fact in facts)
+
+
+def answer_numeric(intent, transactions):
+    """
+    Answer a pure aggregation question directly. Returns markdown text, or None when the
+    intent is not one this function can answer on its own.
+    """
+    if not intent or not intent.get("pure"):
+        return None
+    df = to_frame(transactions)
+    if df.empty:
+        return "There are no transactions in the selected period."
+
+    metric, side, group, top_k = intent["metric"], intent["side"], intent["group"], intent["top_k"]
+    period = f"between {df['Date'].min():%d-%m-%Y} and {df['Date'].max():%d-%m-%Y}"
+    column = "Deposit" if side == "deposit" else "Withdrawal"
+    noun = "deposits" if side == "deposit" else "withdrawals"
+    rows = df[df[column] > 0]
+
+    if group:
+        if rows.empty:
+            return f"There are no {noun} {period}."
+        grouped = _grouped(rows, group, column)
+        if group == "merchant":
+            grouped = grouped.head(top_k)
+        lines = [f"| {group.title()} | Total | Count |", "|---|---:|---:|"]
+        lines += [f"| {k} | {_money(v['sum'])} | {int(v['count'])} |" for k, v in grouped.iterrows()]
+        return f"{noun.title()} by {group} {period}:\n\n" + "\n".join(lines)
+
+    if metric == "balance":
+        last = df.sort_values("Date", kind="stable").dropna(subset=["Balance"])
+        if last.empty:
+            return None
+        row = last.iloc[-1]
+        return f"Your balance was {_money(row['Balance'])} after the last transaction on {row['Date']:%d-%m-%Y}."
+
+    if side is None and metric == "sum":
+        deposits, withdrawals = df["Deposit"].sum(), df["Withdrawal"].sum()
+        return (f"{period.capitalize()} you deposited {_money(deposits)} and withdrew {_money(withdrawals)}, "
+                f"a net of {_money(deposits - withdrawals)} over {len(df)} transactions.")
+
+    if side is None and metric == "count":
+        return f"There were {len(df)} transactions {period}."
+    if side is None and metric in ("max", "min", "avg"):
+        return None  # "largest transaction" is ambiguous between the two sides; let the LLM phrase it.
+    if rows.empty:
+        return f"There are no {noun} {period}."
+    if metric == "count":
+        return f"There were {len(rows)} {noun} {period}."
+    if metric == "sum":
+        verb = "received" if side == "deposit" else "spent"
+        return f"You {verb} {_money(rows[column].sum())} {period}, across {len(rows)} {noun}."
+    if metric == "avg":
+        return f"Your average {noun[:-1]} {period} was {_money(rows[column].mean())} over {len(rows)} {noun}."
+    ordered = rows.nlargest(top_k, column) if metric == "max" else rows.nsmallest(top_k, column)
+    label = "Largest" if metric == "max" else "Smallest"
+    if not intent.get("ranked"):
+        return f"{label} {noun[:-1]} {period}: {_row(ordered.iloc[0])}."
+    lines = [f"{i}. {_row(r)}" for i, (_, r) in enumerate(ordered.iterrows(), 1)]
+    return f"{label} {noun} {period}:\n\n" + "\n".join(lines)
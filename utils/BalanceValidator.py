@@ -0,0 +1,69 @@
+import numpy as np
+
+# Two amounts closer than this are considered equal when checking balances.
+BALANCE_TOLERANCE = 0.01
+
+
+def _column(transactions, field):
+    """Return a float array for a transaction field, with NaN for missing values."""
+    values = []
+    for txn in transactions:
+        try:
+            values.append(float(txn.get(field)) if txn.get(field) is not None else np.nan)
+        except (TypeError, ValueError):
+            values.append(np.nan)
+    return np.array(values, dtype=float)
+
+
+def validate_balance_chain(transactions, opening_balance=None, tolerance=BALANCE_TOLERANCE):
+    """
+    Check prev_balance + Deposit - Withdrawal = Balance for every row at once.
+
+    The first row is only checked when `opening_balance` is known. Rows with a
+    missing balance count as broken.
+
+    Returns a dict with:
+      - "ok": True if no link is broken.
+      - "broken": indices of rows whose link is broken.
+      - "swappable": broken rows that would be fixed by swapping Deposit and Withdrawal.
+    """
+    if not transactions:
+        return {"ok": True, "broken": [], "swappable": []}
+
+    balance = _column(transactions, "Balance")
+    deposit = np.nan_to_num(_column(transactions, "Deposit"))
+    withdrawal = np.nan_to_num(_column(transactions, "Withdrawal"))
+
+    prev_balance = np.empty_like(balance)
+    prev_balance[0] = np.nan if opening_balance is None else opening_balance
+    prev_balance[1:] = balance[:-1]
+
+    checkable = ~np.isnan(prev_balance)
+    broken = np.isnan(balance) | (checkable & (np.abs(prev_balance + deposit - withdrawal - balance) > tolerance))
+    swappable = broken & checkable & (np.abs(prev_balance - deposit + withdrawal - balance) <= tolerance)
+
+    return {
+        "ok": not broken.any(),
+        "broken": np.flatnonzero(broken).tolist(),
+        "swappable": np.flatnonzero(swappable).tolist(),
+    }
+
+
+def repair_balance_chain(transactions, opening_balance=None, tolerance=BALANCE_TOLERANCE):
+    """
+    Swap Deposit and Withdrawal in place on every row where that fixes the chain
+    (e.g. debits extracted under Deposit), then re-validate.
+
+    Returns the validation report after repair, plus "swapped": the repaired row indices.
+    """
+    report = validate_balance_chain(transactions, opening_balance, tolerance)
+    for i in report["swappable"]:
+        txn = transactions[i]
+        txn["Deposit"], txn["Withdrawal"] = txn.get("Withdrawal"), txn.get("Deposit")
+    if report["swappable"]:
+        swapped = report["swappable"]
+        report = validate_balance_chain(transactions, opening_balance, tolerance)
+        report["swapped"] = swapped
+    else:
+        report["swapped"] = []
+    return report
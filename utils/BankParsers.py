@@ -0,0 +1,129 @@
+import re
+from utils.BalanceValidator import validate_balance_chain
+
+# Regex for the "Date Particulars Deposits Withdrawals Balance" layout
+# (originally tuned in utils/DocumentParsingAgent2.py).
+TRANSACTION_PATTERN = re.compile(
+    r"(\d{2}-\d{2}-\d{4})\s+"     # Date (dd-mm-yyyy)
+    r"([\s\S]*?)\s+"              # Particulars (multi-line, non-greedy)
+    r"(?:Chq:\s*\d+\s+)?"         # Optional cheque reference
+    r"([\d,]+\.\d{2})?\s*"        # Deposits (optional, with commas)
+    r"([\d,]+\.\d{2})?\s*"        # Withdrawals (optional, with commas)
+    r"([\d,]+\.\d{2})"            # Balance (mandatory, with commas)
+)
+
+OPENING_BALANCE_PATTERN = re.compile(
+    r"(?:Opening\s+Balance|Balance\s+B/F|Brought\s+Forward)\s*:?\s*([\d,]+\.\d{2})",
+    re.IGNORECASE,
+)
+
+
+def to_amount(value):
+    """Convert a '1,234.50' style string to float, or None if empty."""
+    return float(value.replace(",", "")) if value else None
+
+
+def check_running_balance(transactions, opening_balance=None):
+    """
+    Return True if every row satisfies prev_balance + Deposit - Withdrawal = Balance.
+    The first row is only checked when the opening balance is known.
+    """
+    return validate_balance_chain(transactions, opening_balance)["ok"]
+
+
+class BankLayoutParser:
+    """
+    Base class for deterministic, per-bank statement parsers.
+
+    Subclasses set `name`, implement `matches` to recognise their layout and
+    `parse` to turn a page into transaction dicts with the same keys the LLM
+    extractor produces (Date, Particulars, Deposit, Withdrawal, Balance).
+    `parse` returns an empty list when it cannot parse the page reliably.
+    """
+    name = "base"
+
+    def matches(self, page_text):
+        raise NotImplementedError
+
+    def parse(self, page_text, opening_balance=None):
+        raise NotImplementedError
+
+
+BANK_PARSERS = []
+
+
+def register_parser(parser_cls):
+    """Class decorator adding a parser to the tiered extractor's registry."""
+    BANK_PARSERS.append(parser_cls())
+    return parser_cls
+
+
+@register_parser
+class DepositsWithdrawalsBalanceParser(BankLayoutParser):
+    """
+    Statements with a "Date Particulars Deposits Withdrawals Balance" table.
+
+    Text extraction drops empty cells, so a row with a single amount does not
+    say which column it came from. The direction is taken from the change in
+    running balance instead, which needs the previous balance for the first row
+    (carried from the previous page or read from an "Opening Balance" line).
+    """
+    name = "deposits-withdrawals-balance"
+    header_pattern = re.compile(r"Date\s+Particulars\s+Deposits\s+Withdrawals\s+Balance")
+
+    def matches(self, page_text):
+        return self.header_pattern.search(page_text) is not None
+
+    def parse(self, page_text, opening_balance=None):
+        if opening_balance is None:
+            match = OPENING_BALANCE_PATTERN.search(page_text)
+            if match:
+                opening_balance = to_amount(match.group(1))
+
+        # Skip the statement preamble (periods, addresses) when the header is on this page.
+        header = self.header_pattern.search(page_text)
+        table_text = page_text[header.end():] if header else page_text
+
+        transactions = []
+        prev_balance = opening_balance
+        for date, particulars, first, second, balance in TRANSACTION_PATTERN.findall(table_text):
+            balance = to_amount(balance)
+            deposit, withdrawal = to_amount(first), to_amount(second)
+            if deposit is not None and withdrawal is None:
+                # Single amount: decide the column from the balance movement.
+                if prev_balance is None:
+                    return []
+                if balance < prev_balance:
+                    deposit, withdrawal = None, deposit
+            transactions.append({
+                "Date": date,
+                "Particulars": particulars.strip().replace("\n", " "),
+                "Deposit": deposit,
+                "Withdrawal": withdrawal,
+                "Balance": balance
+            })
+            prev_balance = balance
+        return transactions
+
+
+def parse_with_layouts(page_text, opening_balance=None, previous_parser=None):
+    """
+    Try the registered layout parsers on a page.
+
+    The parser that handled the previous page is tried first and does not need
+    to see its header again (continuation pages usually omit it). A result is
+    only accepted if it passes the running-balance check.
+
+    Returns (parser_name, transactions) or None if the page needs the LLM.
+    """
+    candidates = [p for p in BANK_PARSERS if p.name == previous_parser]
+    candidates += [p for p in BANK_PARSERS if p.name != previous_parser and p.matches(page_text)]
+    for parser in candidates:
+        try:
+            transactions = parser.parse(page_text, opening_balance)
+        except Exception as e:
+            print(f"Layout parser {parser.name} failed:", e)
+            continue
+        if transactions and check_running_balance(transactions, opening_balance):
+            return parser.name, transactions
+    return None
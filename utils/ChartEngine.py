@@ -0,0 +1,181 @@
+import re
+import json
+import plotly.express as px
+from utils.Aggregations import to_frame
+from utils.Downsample import downsample_series, choose_level
+
+# The LLM only picks charts; this module builds them from the data. A spec is a small dict:
+#   {"type": "line", "x": "Month", "y": ["Withdrawal"], "aggregation": "sum",
+#    "group_by": null, "top_k": 10, "title": "Spending per month"}
+CHART_TYPES = ("line", "bar", "pie", "histogram", "scatter", "area")
+X_COLUMNS = ("Date", "Day", "Week", "Month", "Weekday", "Merchant", "Type")
+Y_COLUMNS = ("Deposit", "Withdrawal", "Amount", "Balance")
+GROUP_COLUMNS = ("Type", "Merchant", "Month", "Weekday")
+AGGREGATIONS = ("sum", "count", "mean", "max", "min", "last", "none")
+CATEGORICAL_X = ("Merchant", "Type", "Weekday")
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MAX_CHARTS = 4
+
+SPEC_PROMPT = f"""
+You are a data visualization specialist. The user's bank transactions are in a table with the columns
+{", ".join(X_COLUMNS + Y_COLUMNS)}:
+    - Date is the transaction date; Day, Week and Month are the same date bucketed; Weekday is the day name.
+    - Merchant is the payee or payer; Type is "Deposit" or "Withdrawal".
+    - Amount is Deposit minus Withdrawal; Balance is the running balance after the transaction.
+You do not see the rows. Choose up to {MAX_CHARTS} charts that best answer the user's request and describe each with a spec:
+    {{"type": one of {list(CHART_TYPES)},
+     "x": one of {list(X_COLUMNS)},
+     "y": a list with one or more of {list(Y_COLUMNS)},
+     "aggregation": one of {list(AGGREGATIONS)} (how rows sharing an x value are combined; "none" plots every row),
+     "group_by": null or one of {list(GROUP_COLUMNS)} (split into coloured series),
+     "top_k": null or the number of largest categories to keep (for Merchant),
+     "title": a short chart title}}
+For pie charts "x" is the category and "y" has exactly one column. For histograms "x" is the value column
+(one of {list(Y_COLUMNS)}) and "y" may be empty.
+Return ONLY a JSON array of specs with no additional text, explanation, or markdown formatting.
+"""
+
+# Used when the LLM returns nothing usable.
+DEFAULT_SPECS = [
+    {"type": "line", "x": "Date", "y": ["Balance"], "aggregation": "last", "title": "Balance over time"},
+    {"type": "bar", "x": "Month", "y": ["Deposit", "Withdrawal"], "aggregation": "sum", "title": "Deposits and withdrawals per month"},
+    {"type": "pie", "x": "Merchant", "y": ["Withdrawal"], "aggregation": "sum", "top_k": 8, "title": "Top payees"},
+]
+
+
+def build_frame(transactions):
+    """The transactions as a DataFrame with the columns chart specs can refer to."""
+    df = to_frame(transactions).sort_values("Date", kind="stable")
+    df["Day"] = df["Date"].dt.floor("D")
+    df["Week"] = df["Date"].dt.to_period("W-SUN").dt.start_time
+    df["Month"] = df["Date"].dt.to_period("M").dt.start_time
+    df["Weekday"] = df["Date"].dt.day_name()
+    df["Amount"] = df["Deposit"] - df["Withdrawal"]
+    df["Type"] = df["Deposit"].gt(0).map({True: "Deposit", False: "Withdrawal"})
+    return df
+
+
+def parse_specs(text):
+    """Parse the LLM's reply into a list of spec dicts (markdown fences tolerated)."""
+    match = re.search(r"```(?:json)?\s*(.*?)\s*```", text, re.DOTALL)
+    text = (match.group(1) if match else text).strip()
+    try:
+        specs = json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r"\[.*\]", text, re.DOTALL)
+        if not match:
+            return []
+        try:
+            specs = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return []
+    if isinstance(specs, dict):
+        specs = [specs]
+    return [spec for spec in specs if isinstance(spec, dict)] if isinstance(specs, list) else []
+
+
+def validate_spec(spec):
+    """Return a cleaned copy of the spec, or None if it cannot be drawn."""
+    chart = str(spec.get("type", "")).lower()
+    x = spec.get("x")
+    y = spec.get("y") or []
+    y = [c for c in ([y] if isinstance(y, str) else y) if c in Y_COLUMNS]
+    aggregation = str(spec.get("aggregation") or "sum").lower()
+    group_by = spec.get("group_by") if spec.get("group_by") in GROUP_COLUMNS else None
+    if chart not in CHART_TYPES or aggregation not in AGGREGATIONS:
+        return None
+    if chart == "histogram":
+        if x not in Y_COLUMNS:
+            x = y[0] if y else None
+        if x is None:
+            return None
+        y = []
+    elif x not in X_COLUMNS or not y:
+        return None
+    if aggregation == "count":
+        y = y[:1]
+    if chart == "pie":
+        y, group_by = y[:1], None
+        aggregation = "sum" if aggregation == "none" else aggregation
+    try:
+        top_k = int(spec["top_k"]) if spec.get("top_k") else None
+    except (TypeError, ValueError):
+        top_k = None
+    if x == "Merchant" and top_k is None:
+        top_k = 10
+    return {"type": chart, "x": x, "y": y, "aggregation": aggregation, "group_by": group_by,
+            "top_k": top_k, "title": str(spec.get("title") or "")[:120]}
+
+
+def aggregate(df, spec):
+    """Rows to plot for a validated spec: one per x value (and group), or every row for "none"."""
+    x, y, group_by = spec["x"], spec["y"], spec["group_by"]
+    if spec["aggregation"] == "none":
+        return df[[x] + y + ([group_by] if group_by and group_by != x else [])]
+    if x == "Merchant" or group_by == "Merchant" or x == "Type":
+        # Only count rows on the side being plotted (e.g. payees of withdrawals).
+        df = df[(df[y] != 0).any(axis=1)] if y else df
+    keys = [x] + ([group_by] if group_by and group_by != x else [])
+    agg = "size" if spec["aggregation"] == "count" else spec["aggregation"]
+    if agg == "size":
+        out = df.groupby(keys, sort=True).size().rename(y[0]).reset_index()
+    else:
+        out = df.groupby(keys, sort=True)[y].agg(agg).reset_index()
+    if spec["top_k"] and x in CATEGORICAL_X and x != "Weekday":
+        keep = out.groupby(x)[y[0]].sum().abs().nlargest(spec["top_k"]).index
+        out = out[out[x].isin(keep)].sort_values(y[0], ascending=False)
+    if x == "Weekday":
+        out["Weekday"] = out["Weekday"].astype("category").cat.set_categories(WEEKDAYS)
+        out = out.sort_values("Weekday")
+    return out
+
+
+def build_figure(df, spec):
+    """Plotly figure for a validated spec."""
+    chart, x, y, color, title = spec["type"], spec["x"], spec["y"], spec["group_by"], spec["title"]
+    if chart == "histogram":
+        return px.histogram(df[df[x] != 0], x=x, color=color, title=title)
+    if chart == "bar" and x in ("Date", "Day") and spec["aggregation"] != "none":
+        # Too many bars to read: bucket by week or month instead (both are frame columns).
+        level = choose_level(df[x])
+        if level != "day":
+            x = level.title()
+            spec = dict(spec, x=x)
+    data = aggregate(df, spec)
+    if chart == "pie":
+        return px.pie(data, names=x, values=y[0], title=title)
+    if len(y) > 1:
+        # Several value columns become one series each.
+        data = data.melt(id_vars=[c for c in data.columns if c not in y], value_vars=y,
+                         var_name="Series", value_name="Value")
+        y, color = "Value", "Series"
+    else:
+        y = y[0]
+    if chart in ("line", "area", "scatter") and x in ("Date", "Day", "Week", "Month"):
+        # Keep the shape of long series (peaks and troughs) with at most MAX_CHART_POINTS per series.
+        data = downsample_series(data, x, y, group=color)
+    if chart == "bar":
+        return px.bar(data, x=x, y=y, color=color, title=title, barmode="group")
+    if chart == "area":
+        return px.area(data, x=x, y=y, color=color, title=title)
+    if chart == "scatter":
+        return px.scatter(data, x=x, y=y, color=color, title=title)
+    return px.line(data, x=x, y=y, color=color, title=title, markers=len(data) <= 60)
+
+
+def render_specs(transactions, specs):
+    """Build every drawable spec into Plotly figure JSON. Returns a list of JSON strings."""
+    df = build_frame(transactions)
+    if df.empty:
+        return []
+    graphs = []
+    for spec in specs[:MAX_CHARTS]:
+        clean = validate_spec(spec)
+        if clean is None:
+            print("Skipping invalid chart spec:", spec)
+            continue
+        try:
+            graphs.append(build_figure(df, clean).to_json())
+        except Exception as e:
+            print("Could not build chart", clean, e)
+    return graphs
@@ -0,0 +1,178 @@
+import os
+import json
+import asyncio
+from datetime import datetime
+from langchain_core.prompts import ChatPromptTemplate
+from utils.asiChat import llmChatAsync
+from utils.PromptEncoder import get_encoder, encode_transactions, count_tokens
+from utils.Aggregations import format_facts
+
+# Tokens of transaction data one prompt may carry; leaves room in the model window
+# for the instructions, the question and the answer.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "24000"))
+# How many partition summaries are requested from the LLM at the same time.
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+MAP_SUMMARY_MAX_TOKENS = int(os.getenv("MAP_SUMMARY_MAX_TOKENS", "700"))
+
+MAP_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are summarising one slice ({label}) of a user's bank transactions so that a later step can answer "
+            "their question without seeing the raw rows. {format} "
+            "Report the exact total deposits and withdrawals, the number of transactions, the opening and closing balance, "
+            "the largest transactions and the main payees, plus anything specifically relevant to the question. "
+            "Be concise and keep every figure exact."),
+    ("user", "Question: {query}\n\nTransactions ({label}):\n{transactions}"),
+])
+
+REDUCE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are analyzing a user's financial transactions. The history was too long to show at once, so it is "
+            "given as chronological summaries, one per period, each with exact totals. "
+            "Spendings are withdrawals and earnings are deposits. Combine the summaries to answer the user's question. "
+            "Respond accurately based only on the provided data."),
+    ("user", "Precomputed facts over the whole period (exact):\n{facts}\n\n"
+            "Summaries:\n{summaries}\n\nUser Query: {query}"),
+])
+
+
+def build_context(transactions, budget=None):
+    """
+    Encode transactions for the answer prompt and check them against the token budget.
+    Returns {"text", "description", "tokens", "fits"}.
+    """
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    text, description = encode_transactions(transactions)
+    tokens = count_tokens(text)
+    return {"text": text, "description": description, "tokens": tokens, "fits": tokens <= budget}
+
+
+def _month_label(txn):
+    try:
+        return datetime.strptime(txn.get("Date", ""), "%d-%m-%Y").strftime("%b-%y")
+    except (TypeError, ValueError):
+        return "Unknown"
+
+
+def _span_label(labels):
+    return labels[0] if labels[0] == labels[-1] else f"{labels[0]} to {labels[-1]}"
+
+
+def pack_partitions(transactions, budget=None):
+    """
+    Split date-ordered transactions into as few partitions as possible, each fitting the
+    token budget. Whole consecutive months are packed together, and a partition is closed
+    at a month boundary when the next month does not fit; only a month that is too big on
+    its own is split into several row chunks. Returns [(label, transactions), ...].
+    """
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    encoder = get_encoder()
+    header_tokens = count_tokens(encoder.encode([]))
+
+    # Consecutive runs of rows from the same month, with their token cost.
+    months = []
+    for txn in transactions:
+        label = _month_label(txn)
+        cost = count_tokens(encoder.encode([txn])) - header_tokens
+        if not months or months[-1][0] != label:
+            months.append((label, [], []))
+        months[-1][1].append(txn)
+        months[-1][2].append(cost)
+
+    partitions = []
+    rows, labels, used = [], [], header_tokens
+    for label, month_rows, costs in months:
+        month_cost = sum(costs)
+        if rows and used + month_cost > budget:
+            partitions.append((_span_label(labels), rows))
+            rows, labels, used = [], [], header_tokens
+        if header_tokens + month_cost <= budget:
+            rows += month_rows
+            labels.append(label)
+            used += month_cost
+            continue
+        # Too big on its own: split the month into row chunks.
+        chunk, chunk_used, part = [], header_tokens, 1
+        for txn, cost in zip(month_rows, costs):
+            if chunk and chunk_used + cost > budget:
+                partitions.append((f"{label} part {part}", chunk))
+                chunk, chunk_used, part = [], header_tokens, part + 1
+            chunk.append(txn)
+            chunk_used += cost
+        partitions.append((f"{label} part {part}", chunk))
+    if rows:
+        partitions.append((_span_label(labels), rows))
+    return partitions
+
+
+async def _summarise(user_query, label, transactions, semaphore):
+    text, description = encode_transactions(transactions)
+    prompt = MAP_PROMPT.format_messages(label=label, format=description, query=user_query, transactions=text)
+    async with semaphore:
+        response = await llmChatAsync(prompt, max_tokens=MAP_SUMMARY_MAX_TOKENS)
+    try:
+        content = json.loads(response)["choices"][0]["message"]["content"]
+    except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+        print(f"Summary of {label} failed:", e)
+        content = "(summary unavailable)"
+    return f"[{label}]\n{content.strip()}"
+
+
+async def _summarise_summaries(user_query, summaries, budget, semaphore):
+    """Fold summaries that do not fit one prompt into groups, summarising each group again."""
+    groups, group, used = [], [], 0
+    for summary in summaries:
+        cost = count_tokens(summary)
+        if group and used + cost > budget:
+            groups.append(group)
+            group, used = [], 0
+        group.append(summary)
+        used += cost
+    groups.append(group)
+    if len(groups) == len(summaries):
+        return summaries  # Every summary is over budget on its own; nothing left to fold.
+
+    async def fold(group):
+        text = "\n\n".join(group)
+        label = _span_label([s.split("]", 1)[0].lstrip("[") for s in group])
+        prompt = MAP_PROMPT.format_messages(label=label, format="The input is a set of period summaries.",
+                                            query=user_query, transactions=text)
+        async with semaphore:
+            response = await llmChatAsync(prompt, max_tokens=MAP_SUMMARY_MAX_TOKENS)
+        try:
+            return f"[{label}]\n" + json.loads(response)["choices"][0]["message"]["content"].strip()
+        except (json.JSONDecodeError, KeyError, IndexError, TypeError):
+            return text
+
+    return list(await asyncio.gather(*(fold(group) for group in groups)))
+
+
+async def map_reduce_prompt(user_query, transactions, budget=None, facts=None):
+    """
+    Build the final prompt for a question over more transactions than fit one prompt.
+
+    Map: the rows are packed into budget-sized partitions (see pack_partitions), which are
+    summarised concurrently, at most MAP_REDUCE_CONCURRENCY at a time. The summaries are
+    folded again if they still do not fit. `facts` (utils.Aggregations.compute_facts) are
+    added as exact totals. The caller sends the returned messages (the reduce step).
+    """
+    budget = budget or CONTEXT_TOKEN_BUDGET
+    partitions = pack_partitions(transactions, budget)
+    print(f"Map-reduce answer over {len(transactions)} transactions in {len(partitions)} partitions")
+
+    semaphore = asyncio.Semaphore(MAP_REDUCE_CONCURRENCY)
+    summaries = await asyncio.gather(*(
+        _summarise(user_query, label, rows, semaphore) for label, rows in partitions
+    ))
+    summaries = list(summaries)
+    while count_tokens("\n\n".join(summaries)) > budget and len(summaries) > 1:
+        folded = await _summarise_summaries(user_query, summaries, budget, semaphore)
+        if len(folded) == len(summaries):
+            break
+        summaries = folded
+
+    return REDUCE_PROMPT.format_messages(summaries="\n\n".join(summaries), facts=format_facts(facts or []),
+                                         query=user_query)
+
+
+async def map_reduce_answer(user_query, transactions, budget=None, facts=None):
+    """Answer over map-reduce summaries (see map_reduce_prompt). Returns the raw response, like llmChat."""
+    prompt = await map_reduce_prompt(user_query, transactions, budget, facts)
+    return await llmChatAsync(prompt)
@@ -0,0 +1,263 @@
+import os
+import re
+import calendar
+from datetime import date, timedelta
+
+# Below this confidence the relevance agent falls back to the LLM.
+DATE_PARSER_MIN_CONFIDENCE = float(os.getenv("DATE_PARSER_MIN_CONFIDENCE", "0.8"))
+# Same "starting date" rule the relevance prompt gives the LLM.
+START_OF_HISTORY = date(1999, 1, 1)
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
+    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
+    "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10,
+    "nov": 11, "november": 11, "dec": 12, "december": 12,
+}
+MONTH = r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+ORD = r"(?:st|nd|rd|th)?"
+UNIT_DAYS = {"day": 1, "week": 7}
+ORDINAL_WORDS = {"first": 1, "1st": 1, "second": 2, "2nd": 2, "third": 3, "3rd": 3, "fourth": 4, "4th": 4}
+
+ALL_TIME_PATTERN = re.compile(
+    r"\b(?:since (?:i|we) (?:started|began|joined|opened\w*)|from the (?:beginning|start)|"
+    r"since the (?:beginning|start)|all[- ]time|ever|entire history|whole history|till date|to date)\b"
+)
+NUMERIC_DATE_PATTERN = re.compile(r"\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4}|\d{2})\b")
+DAY_MONTH_PATTERN = re.compile(rf"\b(\d{{1,2}}){ORD}\s+(?:of\s+)?{MONTH}\b(?:,?\s+(\d{{4}}))?")
+MONTH_DAY_PATTERN = re.compile(rf"\b{MONTH}\s+(\d{{1,2}}){ORD}\b(?:,?\s+(\d{{4}}))?")
+DAY_SPAN_PATTERN = re.compile(rf"\b(?:between|from)\s+(?:the\s+)?(\d{{1,2}}){ORD}\s+(?:and|to|till|until|-)\s+(?:the\s+)?(\d{{1,2}}){ORD}\b")
+QUARTER_PATTERN = re.compile(
+    r"\b(?:q([1-4])|(first|second|third|fourth|1st|2nd|3rd|4th) quarter)"
+    r"(?:\s+(?:of\s+)?(?:(\d{4})|(?:the\s+)?(this|current|last|previous) year))?\b"
+)
+RELATIVE_QUARTER_PATTERN = re.compile(r"\b(this|current|last|previous) quarter\b")
+LAST_N_PATTERN = re.compile(r"\b(?:last|past|previous)\s+(\d{1,3})\s+(day|week|month|year)s?\b")
+RELATIVE_PATTERN = re.compile(r"\b(today|yesterday|(?:this|current|last|previous|past) (?:week|month|year))\b")
+MONTH_PATTERN = re.compile(rf"\b(?:(last|this|previous)\s+)?{MONTH}\b(?:\s*[-']?\s*(\d{{4}}|\d{{2}})\b)?")
+YEAR_PATTERN = re.compile(r"\b((?:19|20)\d{2})\b")
+SINCE_PATTERN = re.compile(r"\b(since)\b")
+UNTIL_PATTERN = re.compile(r"\b(until|till|up to)\b")
+BEFORE_PATTERN = re.compile(r"\b(before)\b")
+
+# Words that still mean "time" if they survive parsing; the query then needs the LLM.
+TEMPORAL_CUES = re.compile(
+    rf"\b(?:{MONTH}|\d+(?:st|nd|rd|th)?|days?|weeks?|weekends?|months?|years?|quarters?|ago|before|after|until|till|since|"
+    r"last|past|previous|recent(?:ly)?|earlier|morning|evening|night|diwali|christmas|holiday\w*)\b"
+)
+
+
+def format_date(d):
+    return d.strftime("%d-%m-%Y")
+
+
+def _month_range(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _shift_months(d, months):
+    index = d.year * 12 + d.month - 1 + months
+    year, month = divmod(index, 12)
+    return date(year, month + 1, min(d.day, calendar.monthrange(year, month + 1)[1]))
+
+
+def _full_year(year):
+    year = int(year)
+    return year + 2000 if year < 100 else year
+
+
+def _infer_year(month, day, today):
+    """Most recent occurrence of month/day that is not in the future."""
+    day = day or 1
+    try:
+        return today.year if date(today.year, month, day) <= today else today.year - 1
+    except ValueError:
+        return today.year
+
+
+def _month_number(token):
+    return MONTHS.get(token[:4] if token.startswith("sept") else token[:3])
+
+
+class _Query:
+    """Lower-cased query with already-consumed spans blanked out."""
+
+    def __init__(self, text):
+        self.text = text.lower()
+
+    def finditer(self, pattern):
+        for match in list(pattern.finditer(self.text)):
+            yield match
+
+    def consume(self, match):
+        start, end = match.span()
+        self.text = self.text[:start] + " " * (end - start) + self.text[end:]
+
+
+def _mixed_overlap(ranges):
+    """True if two different ranges overlap, e.g. a quarter and the year it is in: likely a misparse."""
+    return any(a != b and a[0] <= b[1] and b[0] <= a[1]
+               for i, a in enumerate(ranges) for b in ranges[i + 1:])
+
+
+def parse_date_ranges_locally(query, today=None):
+    """
+    Rule-based extraction of the date ranges a query refers to.
+
+    Understands explicit dates ("03-03-2025", "3rd March", "March 3, 2025"),
+    day spans inside a month ("March between 3rd and 5th"), named months,
+    quarters, years, "today"/"yesterday", "this/last week|month|year",
+    "last N days/weeks/months/years", "since X" and "since I started".
+
+    Returns (date_ranges, confidence) where date_ranges has the same shape as the
+    relevance LLM output ([{"start": "dd-mm-yyyy", "end": "dd-mm-yyyy"}, ...]) and
+    confidence drops when part of the query still looks temporal but was not understood,
+    or when the query produced overlapping ranges of different sizes.
+    """
+    today = today or date.today()
+    q = _Query(query)
+    ranges = []
+
+    for match in q.finditer(ALL_TIME_PATTERN):
+        ranges.append((START_OF_HISTORY, today))
+        q.consume(match)
+
+    for match in q.finditer(NUMERIC_DATE_PATTERN):
+        try:
+            d = date(_full_year(match.group(3)), int(match.group(2)), int(match.group(1)))
+        except ValueError:
+            continue
+        ranges.append((d, d))
+        q.consume(match)
+
+    for pattern, day_group, month_group in ((DAY_MONTH_PATTERN, 1, 2), (MONTH_DAY_PATTERN, 2, 1)):
+        for match in q.finditer(pattern):
+            month, day = _month_number(match.group(month_group)), int(match.group(day_group))
+            year = int(match.group(3)) if match.group(3) else _infer_year(month, day, today)
+            try:
+                d = date(year, month, day)
+            except ValueError:
+                continue
+            ranges.append((d, d))
+            q.consume(match)
+
+    for match in q.finditer(LAST_N_PATTERN):
+        n, unit = int(match.group(1)), match.group(2)
+        if unit in UNIT_DAYS:
+            start = today - timedelta(days=n * UNIT_DAYS[unit] - 1)
+        else:
+            start = _shift_months(today, -n * (12 if unit == "year" else 1)) + timedelta(days=1)
+        ranges.append((start, today))
+        q.consume(match)
+
+    for match in q.finditer(QUARTER_PATTERN):
+        quarter = int(match.group(1)) if match.group(1) else ORDINAL_WORDS[match.group(2)]
+        if match.group(3):
+            year = int(match.group(3))
+        elif match.group(4):  # "Q2 last year", "first quarter of this year"
+            year = today.year - (1 if match.group(4) in ("last", "previous") else 0)
+        else:
+            year = today.year if quarter <= (today.month - 1) // 3 + 1 else today.year - 1
+        ranges.append((date(year, 3 * quarter - 2, 1), _month_range(year, 3 * quarter)[1]))
+        q.consume(match)
+
+    for match in q.finditer(RELATIVE_QUARTER_PATTERN):
+        start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+        if match.group(1) in ("last", "previous"):
+            start = _shift_months(start, -3)
+        ranges.append((start, _shift_months(start, 3) - timedelta(days=1)))
+        q.consume(match)
+
+    # Year modifiers for bare month names ("March this year", "June last year").
+    year_override = None
+    for phrase, offset in (("this year", 0), ("current year", 0), ("last year", -1), ("previous year", -1)):
+        if phrase in q.text and MONTH_PATTERN.search(q.text):
+            year_override = today.year + offset
+            q.text = q.text.replace(phrase, " " * len(phrase))
+
+    day_span = next(q.finditer(DAY_SPAN_PATTERN), None)
+    month_matches = []
+    for match in q.finditer(MONTH_PATTERN):
+        token = match.group(2)
+        # "may" is usually the verb unless a year or a preposition pins it down.
+        if token == "may" and not match.group(3) and not re.search(r"\b(in|of|during|for|since|from)\s+$", q.text[:match.start()]):
+            continue
+        month = _month_number(token)
+        if match.group(3):
+            year = _full_year(match.group(3))
+        elif year_override is not None:
+            year = year_override
+        else:
+            year = _infer_year(month, None, today)
+            if match.group(1) in ("last", "previous") and year == today.year:
+                year -= 1
+        month_matches.append((year, month))
+        q.consume(match)
+
+    if day_span and len(month_matches) == 1:
+        year, month = month_matches[0]
+        try:
+            ranges.append((date(year, month, int(day_span.group(1))), date(year, month, int(day_span.group(2)))))
+            q.consume(day_span)
+            month_matches = []
+        except ValueError:
+            pass
+    ranges.extend(_month_range(year, month) for year, month in month_matches)
+
+    for match in q.finditer(RELATIVE_PATTERN):
+        phrase = match.group(1)
+        if phrase == "today":
+            ranges.append((today, today))
+        elif phrase == "yesterday":
+            ranges.append((today - timedelta(days=1),) * 2)
+        elif phrase.endswith("week"):
+            start = today - timedelta(days=today.weekday())
+            if not phrase.startswith(("this", "current")):
+                start -= timedelta(days=7)
+                ranges.append((start, start + timedelta(days=6)))
+            else:
+                ranges.append((start, today))
+        elif phrase.endswith("month"):
+            start = date(today.year, today.month, 1)
+            if not phrase.startswith(("this", "current")):
+                start = _shift_months(start, -1)
+                ranges.append(_month_range(start.year, start.month))
+            else:
+                ranges.append((start, today))
+        else:
+            if phrase.startswith(("this", "current")):
+                ranges.append((date(today.year, 1, 1), today))
+            else:
+                ranges.append((date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)))
+        q.consume(match)
+
+    for match in q.finditer(YEAR_PATTERN):
+        year = int(match.group(1))
+        ranges.append((date(year, 1, 1), date(year, 12, 31)))
+        q.consume(match)
+
+    if not ranges:
+        return [], 0.0
+
+    # "between X and Y" / "from X to Y" span two parsed dates; "since X" / "until X"
+    # open the range up to today / back to the start of history. "before X" stops the
+    # day before X starts, "until X" includes X.
+    span = re.search(r"\b(?:between|from)\b.*\b(?:and|to|till|until)\b", q.text)
+    since = SINCE_PATTERN.search(q.text)
+    until = UNTIL_PATTERN.search(q.text) or BEFORE_PATTERN.search(q.text)
+    if span and len(ranges) == 2:
+        ranges = [(min(start for start, _ in ranges), max(end for _, end in ranges))]
+        q.text = re.sub(r"\b(?:between|from|and|to|till|until)\b", " ", q.text)
+    elif since and not until:
+        ranges = [(min(start for start, _ in ranges), today)]
+        q.consume(since)
+    elif until and not since:
+        if until.group(1) == "before":
+            ranges = [(START_OF_HISTORY, min(start for start, _ in ranges) - timedelta(days=1))]
+        else:
+            ranges = [(START_OF_HISTORY, max(end for _, end in ranges))]
+        q.consume(until)
+
+    confidence = 0.5 if TEMPORAL_CUES.search(q.text) or _mixed_overlap(ranges) else 1.0
+    date_ranges = [{"start": format_date(start), "end": format_date(end)} for start, end in ranges]
+    return date_ranges, confidence
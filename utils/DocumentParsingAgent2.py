@@ -1,20 +1,15 @@
 import json
 import re
 import os
+from utils.BankParsers import TRANSACTION_PATTERN
+from utils.TransactionStore import get_store
 
 # Load JSON data
 with open("INFO/output.json", "r", encoding="utf-8") as file:
     info_data = json.load(file)
 
-# Improved Regex Pattern
-transaction_pattern = re.compile(
-    r"(\d{2}-\d{2}-\d{4})\s+"     # Date (dd-mm-yyyy)
-    r"([\s\S]*?)\s+"              # Particulars (multi-line, non-greedy)
-    r"(?:Chq:\s*\d+\s+)?"         # Optional cheque reference
-    r"([\d,]+\.\d{2})?\s*"        # Deposits (optional, with commas)
-    r"([\d,]+\.\d{2})?\s*"        # Withdrawals (optional, with commas)
-    r"([\d,]+\.\d{2})"            # Balance (mandatory, with commas)
-)
+# Improved Regex Pattern (shared with the layout parsers used by DocParserAgent)
+transaction_pattern = TRANSACTION_PATTERN
 
 def extract_transactions(page_content):
     transactions = []
@@ -48,37 +43,15 @@ def process_all_files(info_data, fileNAme):
         transactions = extract_transactions(full_text[start_idx:])
         processed_data[file_name] = transactions
 
-    # with open("INFO/processed_output.json", "w", encoding="utf-8") as outfile:
-    #     json.dump(processed_data, outfile, indent=4)
-    output_file = "INFO/processed_output.json"
-
-    # Load existing data if the file exists
-    if os.path.exists(output_file):
-        with open(output_file, "r", encoding="utf-8") as infile:
-            try:
-                existing_data = json.load(infile)
-                if not isinstance(existing_data, dict):
-                    existing_data = {}  # Ensure it's a dictionary
-            except json.JSONDecodeError:
-                existing_data = {}  # Handle invalid JSON cases
-    else:
-        existing_data = {}
-
-    # Append new data to the existing dictionary
-    existing_data.update(processed_data)
-
-    # Write the updated data back to the file
-    with open(output_file, "w", encoding="utf-8") as outfile:
-        json.dump(existing_data, outfile, indent=4)
+    # Append the new transactions to the transaction store (duplicates are skipped)
+    store = get_store()
+    for transactions in processed_data.values():
+        store.append(transactions)
 
     return processed_data
 
 if __name__ == "__main__":
    # Run processing
-    processed_transactions = process_all_files(info_data)
-
-    # Save processed transactions
-    with open("INFO/processed_output.json", "w", encoding="utf-8") as outfile:
-        json.dump(processed_transactions, outfile, indent=4)
+    processed_transactions = process_all_files(info_data, None)
 
-    print("✅ Processing complete! Transactions saved to INFO/processed_output.json")
+    print("✅ Processing complete! Transactions saved to", get_store().path)
@@ -0,0 +1,92 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Upper bound on the points one chart series sends to the browser.
+MAX_CHART_POINTS = int(os.getenv("MAX_CHART_POINTS", "1000"))
+# Upper bound on the bars of a time-bucketed bar chart; picks the day/week/month level.
+MAX_CHART_BUCKETS = int(os.getenv("MAX_CHART_BUCKETS", "120"))
+
+LEVEL_FREQ = {"day": "D", "week": "W-SUN", "month": "M"}
+
+
+def choose_level(dates, max_buckets=MAX_CHART_BUCKETS):
+    """
+    Coarsest-needed time bucket for a date range: "day" if the range has at most
+    `max_buckets` days, else "week" if it has at most that many weeks, else "month".
+    """
+    dates = pd.to_datetime(pd.Series(dates)).dropna()
+    if dates.empty:
+        return "day"
+    days = (dates.max() - dates.min()).days + 1
+    if days <= max_buckets:
+        return "day"
+    if days / 7 <= max_buckets:
+        return "week"
+    return "month"
+
+
+def bucket(dates, level):
+    """Start of the day/week/month each date falls in."""
+    dates = pd.to_datetime(dates)
+    if level == "day":
+        return dates.dt.floor("D")
+    return dates.dt.to_period(LEVEL_FREQ[level]).dt.start_time
+
+
+def aggregate_by_level(df, x, columns, level=None, how="sum", max_buckets=MAX_CHART_BUCKETS):
+    """
+    Group rows into day/week/month buckets of the date column `x` (level chosen from the
+    range when not given) and combine `columns` with `how` ("sum", "last", "count", ...).
+    Returns (DataFrame with x and columns, level).
+    """
+    level = level or choose_level(df[x], max_buckets)
+    keys = bucket(df[x], level).rename(x)
+    if how == "count":
+        out = df.groupby(keys).size().rename(columns[0]).reset_index()
+    else:
+        out = df.groupby(keys)[columns].agg(how).reset_index()
+    return out, level
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: indices of `threshold` points of (x, y) that keep
+    the visual shape of the series, including its peaks and troughs. x must be sorted.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (threshold - 2)  # points per bucket; first and last points are always kept
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        # The third triangle vertex is the average of the next bucket (the last point for the final one).
+        nlo, nhi = hi, min(int((i + 2) * every) + 1, n)
+        if nlo >= nhi:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_series(df, x, y, max_points=MAX_CHART_POINTS, group=None):
+    """
+    Reduce a line/area series to at most `max_points` rows (per `group`, if given) with
+    LTTB on column `y`. Rows with a missing y are dropped; short series are returned as is.
+    """
+    if group is not None:
+        parts = [downsample_series(part, x, y, max_points) for _, part in df.groupby(group, sort=False)]
+        return pd.concat(parts) if parts else df
+    df = df.dropna(subset=[y]).sort_values(x, kind="stable")
+    if len(df) <= max_points:
+        return df
+    xs = pd.to_datetime(df[x]).astype("int64") if not pd.api.types.is_numeric_dtype(df[x]) else df[x]
+    return df.iloc[lttb(xs.to_numpy(), df[y].to_numpy(), max_points)]
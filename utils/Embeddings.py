@@ -0,0 +1,35 @@
+import os
+import threading
+import numpy as np
+
+# Small local sentence embedding model shared by the intent router and the semantic cache.
+# Loaded on first use; set EMBEDDINGS_ENABLED=false to run without it.
+EMBEDDINGS_ENABLED = os.getenv("EMBEDDINGS_ENABLED", "true").lower() == "true"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_embedder():
+    """Return the SentenceTransformer model, or None when disabled or not installed."""
+    global _model
+    if _model is None and EMBEDDINGS_ENABLED:
+        with _model_lock:
+            if _model is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+                except Exception as e:
+                    print("Sentence embeddings unavailable:", e)
+                    _model = False
+    return _model or None
+
+
+def embed(texts):
+    """Unit-normalised embeddings (one row per text) as a float32 array, or None."""
+    model = get_embedder()
+    if model is None:
+        return None
+    vectors = model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+    return np.asarray(vectors, dtype=np.float32)
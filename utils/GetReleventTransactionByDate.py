@@ -1,9 +1,12 @@
 import json
 import re
 from datetime import datetime
+from utils.TransactionStore import get_store
+from utils.TransactionIndex import DateIndex
 
-with open("INFO/processed_output.json", "r") as file:
-        database = json.load(file)
+database = get_store().read_all()
+# Per-key date indexes, built on first use.
+_indexes = {}
 
 def get_filtered_transactions(key, start_date, end_date):
     """
@@ -19,16 +22,14 @@ def get_filtered_transactions(key, start_date, end_date):
         list: Filtered transactions within the given date range.
     """
     try:
-        start_dt = datetime.strptime(start_date, "%d-%m-%Y")
-        end_dt = datetime.strptime(end_date, "%d-%m-%Y")
+        start_ord = datetime.strptime(start_date, "%d-%m-%Y").toordinal()
+        end_ord = datetime.strptime(end_date, "%d-%m-%Y").toordinal()
 
         if key in database:
-            transactions = database[key]
+            if key not in _indexes:
+                _indexes[key] = DateIndex(database[key])
 
-            filtered_transactions = [
-                txn for txn in transactions
-                if start_dt <= datetime.strptime(txn["Date"], "%d-%m-%Y") <= end_dt
-            ]
+            filtered_transactions = _indexes[key].query([(start_ord, end_ord)])
             return filtered_transactions
         else:
             print(f"⚠️ No transactions found for {key}")
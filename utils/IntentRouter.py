@@ -0,0 +1,127 @@
+import os
+import re
+import random
+import numpy as np
+from utils.Embeddings import embed
+
+# The embedding classifier only decides when the best class is at least this similar
+# to the query and beats the other class by INTENT_MIN_MARGIN; otherwise the LLM decides.
+INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", "0.45"))
+INTENT_MIN_MARGIN = float(os.getenv("INTENT_MIN_MARGIN", "0.08"))
+
+FINANCE = "finance"  # needs the transaction database
+CHAT = "chat"        # small talk, answered without it
+
+GREETING_PATTERN = re.compile(
+    r"^\s*(?:(?:hi+|hello+|hey+|hiya|yo|namaste|greetings|good (?:morning|afternoon|evening|night)|"
+    r"how are you(?: doing)?|how's it going|what's up|sup|thanks?(?: you)?(?: so much)?|thx|ok(?:ay)?|cool|great|"
+    r"bye|goodbye|see you)(?:\s+(?:there|buddy|bot|agent|friend))?[\s!.?,]*)+$",
+    re.IGNORECASE,
+)
+FINANCE_PATTERN = re.compile(
+    r"\b(?:spen[dt]|spending|expens\w*|transaction\w*|balance|deposit\w*|withdr[ae]w\w*|paid|pay(?:ment)?s?|upi|neft|imps|"
+    r"salary|income|earn\w*|money|rupees?|rs\.?|inr|amount|bank|credit\w*|debit\w*|transfer\w*|merchant\w*|statement\w*|"
+    r"bills?|emi|loan|fees?|refund\w*|cash|atm|savings?|budget\w*|how much|largest|biggest|total|"
+    r"jan(?:uary)?|feb(?:ruary)?|march|apr(?:il)?|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?|"
+    r"last (?:week|month|year)|this (?:week|month|year))\b|₹",
+    re.IGNORECASE,
+)
+
+GREETING_REPLIES = {
+    "thanks": ["You're welcome! Ask me anything about your transactions."],
+    "bye": ["Goodbye! Come back any time to check on your finances."],
+    "hello": [
+        "Hello! I can answer questions about your transactions, e.g. \"How much did I spend last month?\"",
+        "Hi there! Ask me about your spending, deposits or balance.",
+    ],
+}
+
+# Examples the embedding classifier compares queries against.
+PROTOTYPES = {
+    FINANCE: [
+        "how much did I spend last month",
+        "show my transactions in March",
+        "what is my current balance",
+        "who did I pay the most",
+        "list all deposits this year",
+        "summarise my expenses since I started",
+        "what was my biggest purchase",
+        "how much money came into my account",
+        "did I receive my salary",
+        "how much do I spend on food",
+    ],
+    CHAT: [
+        "hello how are you",
+        "who are you",
+        "what can you do",
+        "tell me a joke",
+        "what is the capital of France",
+        "explain what inflation is",
+        "thank you that was helpful",
+        "what is a mutual fund",
+        "write a poem",
+        "what's the weather like",
+    ],
+}
+
+_prototype_vectors = None
+
+
+def _prototypes():
+    global _prototype_vectors
+    if _prototype_vectors is None:
+        vectors = {label: embed(examples) for label, examples in PROTOTYPES.items()}
+        _prototype_vectors = vectors if all(v is not None for v in vectors.values()) else False
+    return _prototype_vectors or None
+
+
+def warm_up():
+    """Load the embedding model and prototype vectors ahead of the first query."""
+    _prototypes()
+
+
+def greeting_reply(query):
+    q = query.lower()
+    if re.search(r"\b(thanks?|thx)\b", q):
+        kind = "thanks"
+    elif re.search(r"\b(bye|goodbye|see you)\b", q):
+        kind = "bye"
+    else:
+        kind = "hello"
+    return random.choice(GREETING_REPLIES[kind])
+
+
+def classify_by_embedding(query):
+    """
+    Nearest-prototype classification. Returns (label, confidence, margin), or None when
+    no embedding model is available.
+    """
+    prototypes = _prototypes()
+    if prototypes is None:
+        return None
+    vector = embed([query])[0]
+    scores = {label: float(np.max(vectors @ vector)) for label, vectors in prototypes.items()}
+    (best, best_score), (_, other_score) = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    return best, best_score, best_score - other_score
+
+
+def route_query(query):
+    """
+    Decide locally whether a query needs the transaction database.
+
+    Returns {"intent": FINANCE | CHAT | None, "source", "reply"}: greetings get a canned
+    reply, finance keywords route straight to the database, and anything else goes to the
+    embedding classifier. intent is None when the local checks are unsure and the LLM
+    should decide.
+    """
+    if GREETING_PATTERN.match(query):
+        return {"intent": CHAT, "source": "greeting", "reply": greeting_reply(query)}
+    if FINANCE_PATTERN.search(query):
+        return {"intent": FINANCE, "source": "keywords", "reply": None}
+    result = classify_by_embedding(query)
+    if result is not None:
+        label, similarity, margin = result
+        print(f"Intent classifier: {label} (similarity {similarity:.2f}, margin {margin:.2f})")
+        if similarity >= INTENT_MIN_SIMILARITY and margin >= INTENT_MIN_MARGIN:
+            return {"intent": label, "source": "embedding", "reply": None}
+    return {"intent": None, "source": "unsure", "reply": None}
@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from uuid import uuid4
+
+# SQLite database (WAL mode) holding the ingest job queue.
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "INFO/jobs.db")
+# A job whose file fails is retried this many times in total, waiting
+# JOB_RETRY_BACKOFF * 2 ** (attempt - 1) seconds before each retry.
+MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", "3"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "5"))  # seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    batch_id TEXT,
+    file_name TEXT NOT NULL,
+    status TEXT NOT NULL,             -- 'queued', 'running', 'done', 'partial' (some pages failed) or 'failed'
+    stage TEXT NOT NULL,              -- finer progress of a running job ('parsing', 'extracting', ...)
+    attempts INTEGER NOT NULL DEFAULT 0,
+    pages INTEGER,
+    pages_done INTEGER,               -- set when the job ends and its job_pages rows are dropped
+    transactions INTEGER,
+    new INTEGER,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    next_attempt REAL NOT NULL,       -- a queued job is not claimed before this time
+    store_mark INTEGER                -- last transaction store id before this job's rows were appended
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs(status, next_attempt);
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs(batch_id);
+-- Extracted pages of a job, so a job interrupted by a crash resumes after its last completed page.
+CREATE TABLE IF NOT EXISTS job_pages (
+    job_id TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    source TEXT,
+    transactions TEXT NOT NULL,       -- JSON list
+    PRIMARY KEY (job_id, page)
+);
+"""
+
+JOB_COLUMNS = ("id, batch_id, file_name, status, stage, attempts, pages, pages_done, transactions, new, error, "
+               "created, started, finished, next_attempt, store_mark")
+# Columns added after the first release, created on databases that lack them.
+ADDED_COLUMNS = {"pages_done": "INTEGER", "store_mark": "INTEGER"}
+
+
+def _row_to_job(row, pages_done=0):
+    job = dict(row)
+    if job["pages_done"] is None:
+        job["pages_done"] = pages_done
+    end = job["finished"] or (time.time() if job["status"] == "running" else None)
+    job["seconds"] = round(end - job["started"], 2) if job["started"] and end else None
+    return job
+
+
+class JobQueue:
+    """
+    Durable queue of files to ingest, backed by SQLite in WAL mode.
+
+    enqueue() only inserts a row, so uploads return at once. Workers claim() the oldest
+    due job; a job that raises is put back with exponential backoff until MAX_JOB_ATTEMPTS.
+    Pages are saved as they are extracted (save_page), and jobs left 'running' by a crash
+    are re-queued by requeue_interrupted(), so they skip the pages already done.
+    """
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for name, kind in ADDED_COLUMNS.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, file_name, batch_id=None):
+        """Add a file to the queue. Returns the job id."""
+        job_id = uuid4().hex
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO jobs (id, batch_id, file_name, status, stage, created, next_attempt) "
+            "VALUES (?, ?, ?, 'queued', 'queued', ?, ?)",
+            (job_id, batch_id, file_name, now, now),
+        )
+        return job_id
+
+    def claim(self):
+        """Mark the oldest due queued job as running and return it, or None if there is none."""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs WHERE status = 'queued' AND next_attempt <= ? "
+                "ORDER BY created LIMIT 1", (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', stage = 'starting', attempts = attempts + 1, "
+                    "started = COALESCE(started, ?) WHERE id = ?", (now, row["id"])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"]) if row is not None else None
+
+    def requeue_interrupted(self):
+        """
+        Put jobs left 'running' by a previous process back in the queue. Returns how many.
+        The interrupted run counts as an attempt, so a file that crashes the process every
+        time is marked failed once it has used MAX_JOB_ATTEMPTS.
+        """
+        conn = self._connection()
+        interrupted = [row["id"] for row in conn.execute(
+            "SELECT id FROM jobs WHERE status = 'running' AND attempts >= ?", (MAX_JOB_ATTEMPTS,))]
+        for job_id in interrupted:
+            self._end(job_id, status="failed", stage="failed", error="Interrupted on every attempt.")
+        cursor = conn.execute("UPDATE jobs SET status = 'queued', stage = 'queued' WHERE status = 'running'")
+        return cursor.rowcount
+
+    def update(self, job_id, **fields):
+        """Set progress columns (stage, pages, ...) of a job."""
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        self._connection().execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _end(self, job_id, **fields):
+        """Record the final state of a job and drop its saved pages, which are no longer needed."""
+        conn = self._connection()
+        pages_done = self._pages_done([job_id]).get(job_id, 0)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.update(job_id, pages_done=pages_done, finished=time.time(), **fields)
+            conn.execute("DELETE FROM job_pages WHERE job_id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def finish(self, job_id, transactions, new, error=None):
+        """Mark a job done, or "partial" when `error` says some of its pages could not be extracted."""
+        self._end(job_id, status="partial" if error else "done", stage="done", transactions=transactions,
+                  new=new, error=error)
+
+    def retry_or_fail(self, job_id, error, permanent=False):
+        """
+        Put a failed job back in the queue with exponential backoff, or mark it failed once
+        it has used MAX_JOB_ATTEMPTS (or right away if the error is `permanent`).
+        Returns True if the job will be retried.
+        """
+        job = self.get(job_id)
+        if permanent or job["attempts"] >= MAX_JOB_ATTEMPTS:
+            self._end(job_id, status="failed", stage="failed", error=error)
+            return False
+        delay = JOB_RETRY_BACKOFF * 2 ** (job["attempts"] - 1)
+        self.update(job_id, status="queued", stage="retrying", error=error, next_attempt=time.time() + delay)
+        return True
+
+    def save_page(self, job_id, page, transactions, source=None):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO job_pages (job_id, page, source, transactions) VALUES (?, ?, ?, ?)",
+            (job_id, page, source, json.dumps(transactions)),
+        )
+
+    def completed_pages(self, job_id):
+        """Pages already extracted for a job, as {page number: transactions}."""
+        rows = self._connection().execute(
+            "SELECT page, transactions FROM job_pages WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        return {row["page"]: json.loads(row["transactions"]) for row in rows}
+
+    def _pages_done(self, job_ids):
+        if not job_ids:
+            return {}
+        rows = self._connection().execute(
+            f"SELECT job_id, COUNT(*) AS n FROM job_pages WHERE job_id IN ({', '.join('?' * len(job_ids))}) "
+            "GROUP BY job_id", job_ids
+        ).fetchall()
+        return {row["job_id"]: row["n"] for row in rows}
+
+    def get(self, job_id):
+        """A job as a dict (its columns plus pages_done and seconds), or None."""
+        row = self._connection().execute(f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return _row_to_job(row, self._pages_done([job_id]).get(job_id, 0))
+
+    def batch(self, batch_id):
+        """The jobs of a batch, in the order they were enqueued."""
+        rows = self._connection().execute(
+            f"SELECT {JOB_COLUMNS} FROM jobs WHERE batch_id = ? ORDER BY created", (batch_id,)
+        ).fetchall()
+        pages_done = self._pages_done([row["id"] for row in rows])
+        return [_row_to_job(row, pages_done.get(row["id"], 0)) for row in rows]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process-wide JobQueue."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue()
+    return _queue
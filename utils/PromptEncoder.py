@@ -0,0 +1,179 @@
+import os
+import io
+import re
+import csv
+import json
+
+# Encoder used for the transactions block of the answer prompt ("csv" or "json").
+PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "csv")
+# Log how many bytes/tokens the chosen encoding saves over the legacy indented JSON.
+# Off by default: the report builds and tokenises the JSON it replaces, on every prompt.
+PROMPT_ENCODING_REPORT = os.getenv("PROMPT_ENCODING_REPORT", "false").lower() == "true"
+TIKTOKEN_ENCODING = os.getenv("TIKTOKEN_ENCODING", "cl100k_base")
+# Non-UPI particulars longer than this are cut; the tail is usually reference numbers.
+MAX_PARTICULARS_CHARS = int(os.getenv("MAX_PARTICULARS_CHARS", "60"))
+
+# UPI/DR/<ref>/<payee>/<bank>/<vpa>/<note>//<txn id>/<timestamp>
+UPI_PATTERN = re.compile(r"^UPI/(DR|CR)/\d*/([^/]*)/([^/]*)/([^/]*)", re.IGNORECASE)
+CHEQUE_SUFFIX_PATTERN = re.compile(r"\s*Chq:\s*\d+\s*$", re.IGNORECASE)
+
+
+def _flatten(transactions):
+    """Accept a list of transactions or a month key -> transactions dict."""
+    if isinstance(transactions, dict):
+        return [txn for txns in transactions.values() for txn in txns]
+    return list(transactions or [])
+
+
+def normalise_particulars(particulars):
+    """
+    Shorten raw statement particulars to "<channel> <merchant>".
+
+    UPI strings keep only the direction and payee ("UPI/DR/5378.../ANSHUL\\nME/AIRP/..."
+    becomes "UPI DR ANSHULME"). PDF extraction wraps these at random points, so line
+    breaks inside them are dropped rather than turned into spaces. Other particulars
+    are whitespace-collapsed, lose a trailing "Chq: <no>" and are capped in length.
+    """
+    text = str(particulars or "")
+    match = UPI_PATTERN.match("".join(text.split()))
+    if match:
+        direction, payee = match.group(1).upper(), match.group(2)
+        return f"UPI {direction} {payee}".strip()
+    text = CHEQUE_SUFFIX_PATTERN.sub("", " ".join(text.split()))
+    if len(text) > MAX_PARTICULARS_CHARS:
+        text = text[:MAX_PARTICULARS_CHARS].rstrip() + "…"
+    return text
+
+
+def _amount(value):
+    """'1234.5' for amounts, '' for missing or zero ones."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return ""
+    return "" if value == 0 else f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+class PromptEncoder:
+    """
+    Base class for the ways transactions can be written into an LLM prompt.
+
+    Subclasses set `name`, a `description` that is put in the system message so
+    the model knows how to read the block, and implement `encode`.
+    """
+    name = "base"
+    description = ""
+
+    def encode(self, transactions):
+        raise NotImplementedError
+
+
+PROMPT_ENCODERS = {}
+
+
+def register_encoder(encoder_cls):
+    """Class decorator adding an encoder to the registry, keyed by its name."""
+    PROMPT_ENCODERS[encoder_cls.name] = encoder_cls()
+    return encoder_cls
+
+
+@register_encoder
+class JsonEncoder(PromptEncoder):
+    """The original encoding: the transactions as indented JSON, unchanged."""
+    name = "json"
+    description = "Each transaction contains Date, Particulars, Deposit, Withdrawal, and Balance."
+
+    def encode(self, transactions):
+        return json.dumps(transactions, indent=4)
+
+
+@register_encoder
+class CsvEncoder(PromptEncoder):
+    """
+    One header line and one CSV row per transaction. Key names are not repeated,
+    empty amounts are left blank and particulars are normalised to channel and merchant.
+    """
+    name = "csv"
+    description = (
+        "Transactions are given as CSV with the header date,particulars,deposit,withdrawal,balance. "
+        "A blank deposit or withdrawal means 0. Particulars are shortened; UPI payments read "
+        "'UPI DR <payee>' for money sent and 'UPI CR <payer>' for money received."
+    )
+
+    def encode(self, transactions):
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(["date", "particulars", "deposit", "withdrawal", "balance"])
+        for txn in _flatten(transactions):
+            writer.writerow([
+                txn.get("Date", ""),
+                normalise_particulars(txn.get("Particulars")),
+                _amount(txn.get("Deposit")),
+                _amount(txn.get("Withdrawal")),
+                _amount(txn.get("Balance")),
+            ])
+        return out.getvalue()
+
+
+def get_encoder(name=None):
+    name = name or PROMPT_ENCODING
+    if name not in PROMPT_ENCODERS:
+        print(f"Unknown prompt encoding {name!r}, using json.")
+        name = "json"
+    return PROMPT_ENCODERS[name]
+
+
+_tokenizer = None
+
+
+def count_tokens(text):
+    """
+    Number of tokens in `text` according to tiktoken. Falls back to the usual
+    ~4 characters per token estimate when tiktoken is not installed.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        try:
+            import tiktoken
+            _tokenizer = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+        except Exception as e:
+            print("tiktoken unavailable, estimating tokens:", e)
+            _tokenizer = False
+    if _tokenizer is False:
+        return (len(text) + 3) // 4
+    return len(_tokenizer.encode(text))
+
+
+def encoding_report(transactions, encoded, baseline=None):
+    """
+    Size of `encoded` against the legacy indented JSON of the same transactions:
+    {"bytes", "baseline_bytes", "bytes_saved", "tokens", "baseline_tokens", "tokens_saved"}.
+    """
+    baseline = JsonEncoder().encode(transactions) if baseline is None else baseline
+    size, baseline_size = len(encoded.encode("utf-8")), len(baseline.encode("utf-8"))
+    tokens, baseline_tokens = count_tokens(encoded), count_tokens(baseline)
+    return {
+        "bytes": size,
+        "baseline_bytes": baseline_size,
+        "bytes_saved": baseline_size - size,
+        "tokens": tokens,
+        "baseline_tokens": baseline_tokens,
+        "tokens_saved": baseline_tokens - tokens,
+    }
+
+
+def encode_transactions(transactions, encoding=None):
+    """
+    Encode transactions for a prompt. Returns (text, description), where
+    description explains the format to the model.
+    """
+    encoder = get_encoder(encoding)
+    encoded = encoder.encode(transactions)
+    if PROMPT_ENCODING_REPORT and encoder.name != "json":
+        report = encoding_report(transactions, encoded)
+        print(
+            f"Prompt encoding {encoder.name}: {report['baseline_bytes']} -> {report['bytes']} bytes "
+            f"({report['bytes_saved']} saved), {report['baseline_tokens']} -> {report['tokens']} tokens "
+            f"({report['tokens_saved']} saved)"
+        )
+    return encoded, encoder.description
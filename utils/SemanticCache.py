@@ -0,0 +1,161 @@
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date
+import numpy as np
+from utils.Embeddings import embed
+from utils.DateRangeParser import TEMPORAL_CUES
+from utils.TransactionDedup import transaction_key
+
+# Cache of query results for the chat endpoints, matched on the meaning of the query.
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+# Minimum cosine similarity between two queries for one to reuse the other's result.
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))  # seconds
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "512"))
+# Size of the hashed character-trigram vectors used when no embedding model is available.
+HASH_EMBEDDING_DIM = 1024
+# Function words and the generic vocabulary of finance questions. Any other word of a
+# query (a payee, a merchant, a category) must match exactly for two queries to share an entry.
+GENERIC_WORDS = frozenset("""
+a an the i me my mine we our you your it its this that these those is are was were be been am do does did
+done have has had will would can could should shall may might must of in on at to for from by with about
+over under into onto during through across per each every all any some what which who whom whose when where
+why how much many total overall sum amount money rs inr rupees please show tell give list find get got
+spend spent spending spends expense expenses expenditure pay paid paying payment payments withdraw withdrew
+withdrawn withdrawal withdrawals debit debits deposit deposited deposits credit credits earn earned earning
+earnings income receive received receiving salary transaction transactions account bank balance
+largest biggest highest maximum max smallest lowest minimum min average avg mean top most least number count
+there so up out just also only than as not no yes ok and or but if then
+""".split())
+
+
+def normalise_query(query):
+    """Lower-case, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w₹]+", " ", query.lower()).split())
+
+
+def _hash_embedding(text):
+    vector = np.zeros(HASH_EMBEDDING_DIM, dtype=np.float32)
+    padded = f"  {text} "
+    for i in range(len(padded) - 2):
+        digest = hashlib.blake2b(padded[i:i + 3].encode("utf-8"), digest_size=4).digest()
+        vector[int.from_bytes(digest, "little") % HASH_EMBEDDING_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def embed_query(normalised):
+    """Sentence embedding of a normalised query, or hashed trigrams without a model."""
+    vectors = embed([normalised])
+    return vectors[0] if vectors is not None else _hash_embedding(normalised)
+
+
+def query_scope(normalised, *parts):
+    """
+    Partition key for an entry. Queries that name different periods, numbers or payees
+    ("March" vs "April", "top 3" vs "top 5", "rahul" vs "rohan") embed almost identically,
+    so the temporal words, numbers and non-generic words of the query are part of the key,
+    with any extra parts the caller adds.
+    """
+    cues = sorted(match.group(0) for match in TEMPORAL_CUES.finditer(normalised))
+    cues += re.findall(r"\d+", normalised)
+    specific = {word for word in TEMPORAL_CUES.sub(" ", normalised).split()
+                if word not in GENERIC_WORDS and not word.isdigit()}
+    return "|".join([" ".join(sorted(set(cues))), " ".join(sorted(specific))] + [str(p) for p in parts])
+
+
+class SemanticCache:
+    """
+    LRU cache of results keyed by query meaning.
+
+    A lookup first tries the exact normalised query, then the most similar cached query
+    (cosine similarity of embeddings) in the same scope. Entries expire after `ttl`
+    seconds and are dropped once the store version they were computed against changes.
+    """
+
+    def __init__(self, name, threshold=SEMANTIC_CACHE_THRESHOLD, ttl=SEMANTIC_CACHE_TTL,
+                 max_entries=SEMANTIC_CACHE_MAX_ENTRIES, enabled=SEMANTIC_CACHE_ENABLED):
+        self.name = name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries = OrderedDict()  # (scope, normalised query) -> entry
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict_stale(self, version, now):
+        for key in [k for k, e in self._entries.items() if e["expires"] < now or e["version"] != version]:
+            del self._entries[key]
+
+    def get(self, query, version, scope=""):
+        """Return the cached value for this query (or a near-identical one), or None."""
+        if not self.enabled:
+            return None
+        normalised = normalise_query(query)
+        key = (query_scope(normalised, scope), normalised)
+        with self._lock:
+            self._evict_stale(version, time.time())
+            entry = self._entries.get(key)
+            candidates = [(k, e) for k, e in self._entries.items() if k[0] == key[0]]
+        if entry is None and candidates:
+            vector = embed_query(normalised)
+            similarities = np.stack([e["vector"] for _, e in candidates]) @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                key, entry = candidates[best]
+                print(f"Semantic cache ({self.name}): {query!r} matched {entry['query']!r} "
+                      f"(similarity {similarities[best]:.3f})")
+        with self._lock:
+            if entry is None or key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def set(self, query, value, version, scope=""):
+        if not self.enabled:
+            return
+        normalised = normalise_query(query)
+        entry = {
+            "query": query,
+            "vector": embed_query(normalised),
+            "value": value,
+            "version": version,
+            "expires": time.time() + self.ttl,
+        }
+        with self._lock:
+            key = (query_scope(normalised, scope), normalised)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+def today_scope():
+    """Relative dates ("last week") resolve differently tomorrow, so results are scoped to today."""
+    return date.today().isoformat()
+
+
+def transactions_digest(transactions):
+    """Short fingerprint of a transaction list, for scoping answers to the exact context."""
+    h = hashlib.sha256()
+    for txn in transactions or []:
+        h.update(transaction_key(txn).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
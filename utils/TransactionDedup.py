@@ -0,0 +1,36 @@
+# Transaction identity used to de-duplicate rows across statements.
+# utils.TransactionStore enforces it with a unique index on this key.
+
+
+def normalise_particulars(particulars):
+    """Lower-case and drop all whitespace, since PDF extraction breaks lines at random points."""
+    return "".join(str(particulars or "").lower().split())
+
+
+def _amount(value):
+    try:
+        return f"{float(value):.2f}"
+    except (TypeError, ValueError):
+        return ""
+
+
+def _float_or_zero(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def transaction_key(txn):
+    """
+    Identity of a transaction across statements: (date, signed amount, balance,
+    normalised particulars). The running balance makes two genuine same-day
+    payments of the same amount to the same payee distinct.
+    """
+    amount = _float_or_zero(txn.get("Deposit")) - _float_or_zero(txn.get("Withdrawal"))
+    return "|".join([
+        str(txn.get("Date", "")),
+        _amount(amount),
+        _amount(txn.get("Balance")),
+        normalise_particulars(txn.get("Particulars")),
+    ])
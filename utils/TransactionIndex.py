@@ -0,0 +1,82 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+
+def date_ordinal(date_str, fmt="%d-%m-%Y"):
+    """Return the proleptic ordinal of a dd-mm-yyyy date string, or None if invalid."""
+    try:
+        return datetime.strptime(date_str, fmt).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def merge_ranges(ranges):
+    """
+    Merge (start_ordinal, end_ordinal) ranges that overlap or touch, so each
+    transaction is scanned (and returned) at most once.
+    """
+    merged = []
+    for start, end in sorted(r for r in ranges if r[0] <= r[1]):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [tuple(r) for r in merged]
+
+
+class DateIndex:
+    """
+    Transactions sorted by date, with their dates kept as integer ordinals in a
+    parallel sorted list. A date range lookup is two bisects and a slice, so
+    its cost depends on the number of matches, not on the size of the history.
+    Rows with the same date keep their insertion order.
+    """
+
+    def __init__(self, transactions=()):
+        self.ordinals = []
+        self.rows = []
+        self.add(transactions)
+
+    @classmethod
+    def from_database(cls, database):
+        """Build an index from a month key -> transactions dict."""
+        return cls(txn for txns in database.values() for txn in txns)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, transactions, ordinals=None):
+        """
+        Add transactions (optionally with precomputed date ordinals).
+        Rows without a valid date are skipped.
+        """
+        if ordinals is None:
+            pairs = [(date_ordinal(txn.get("Date")), txn) for txn in transactions]
+        else:
+            pairs = list(zip(ordinals, transactions))
+        pairs = [(o, txn) for o, txn in pairs if o is not None]
+        if not pairs:
+            return
+        pairs.sort(key=lambda p: p[0])  # stable: same-date rows keep their order
+        if not self.ordinals or pairs[0][0] >= self.ordinals[-1]:
+            # Common case: new statements are newer than anything indexed.
+            self.ordinals.extend(o for o, _ in pairs)
+            self.rows.extend(txn for _, txn in pairs)
+            return
+        # Both runs are sorted, so this stable sort is effectively a linear merge.
+        combined = list(zip(self.ordinals, self.rows)) + pairs
+        combined.sort(key=lambda p: p[0])
+        self.ordinals = [o for o, _ in combined]
+        self.rows = [txn for _, txn in combined]
+
+    def query(self, ranges):
+        """
+        Return transactions whose date falls in any of the (start_ordinal,
+        end_ordinal) ranges (inclusive), in date order.
+        """
+        results = []
+        for start, end in merge_ranges(ranges):
+            lo = bisect_left(self.ordinals, start)
+            hi = bisect_right(self.ordinals, end)
+            results.extend(self.rows[lo:hi])
+        return results
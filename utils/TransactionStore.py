@@ -0,0 +1,300 @@
+import os
+import json
+import sqlite3
+import threading
+from datetime import date, datetime
+from utils.TransactionDedup import transaction_key
+from utils.TransactionIndex import DateIndex
+
+# SQLite database (WAL mode) holding every ingested transaction.
+TRANSACTION_DB_PATH = os.getenv("TRANSACTION_DB_PATH", "INFO/transactions.db")
+# Old whole-file JSON store; imported once into an empty database.
+LEGACY_JSON_PATH = "INFO/processed_output.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    month_key TEXT NOT NULL,        -- '%b-%y', e.g. 'Jan-25'
+    month_ord INTEGER NOT NULL,     -- year * 12 + month, for ordering months
+    date_ord INTEGER NOT NULL,      -- date.toordinal()
+    date TEXT NOT NULL,             -- 'dd-mm-yyyy', as extracted
+    particulars TEXT,
+    deposit REAL,
+    withdrawal REAL,
+    balance REAL,
+    dedup_key TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_month ON transactions(month_ord);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date_ord);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+-- Per-day totals for the dashboard, updated in the same transaction as each append.
+CREATE TABLE IF NOT EXISTS daily_rollups (
+    date_ord INTEGER PRIMARY KEY,
+    month_key TEXT NOT NULL,
+    month_ord INTEGER NOT NULL,
+    deposit REAL NOT NULL DEFAULT 0,
+    withdrawal REAL NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    balance REAL                     -- balance after the day's last ingested transaction
+);
+CREATE INDEX IF NOT EXISTS idx_daily_rollups_month ON daily_rollups(month_ord);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO daily_rollups (date_ord, month_key, month_ord, deposit, withdrawal, count, balance)
+VALUES (?, ?, ?, ?, ?, 1, ?)
+ON CONFLICT(date_ord) DO UPDATE SET
+    deposit = deposit + excluded.deposit,
+    withdrawal = withdrawal + excluded.withdrawal,
+    count = count + 1,
+    balance = COALESCE(excluded.balance, balance)
+"""
+
+COLUMNS = "id, month_key, date_ord, date, particulars, deposit, withdrawal, balance"
+
+
+def _row_to_transaction(row):
+    return {
+        "Date": row["date"],
+        "Particulars": row["particulars"],
+        "Deposit": row["deposit"],
+        "Withdrawal": row["withdrawal"],
+        "Balance": row["balance"],
+    }
+
+
+def _to_float(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TransactionStore:
+    """
+    Repository for transactions, backed by SQLite in WAL mode.
+
+    Appends only touch the new rows and run in a single transaction, so
+    concurrent uploads cannot corrupt the store. Duplicates (see
+    utils.TransactionDedup.transaction_key) are ignored by a unique index.
+    Reads can fetch one month, everything, or only rows added after a given id.
+    `version()` changes whenever rows are added.
+    """
+
+    def __init__(self, path=TRANSACTION_DB_PATH, legacy_json_path=LEGACY_JSON_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        if legacy_json_path and os.path.exists(legacy_json_path) and self.count() == 0:
+            self._import_legacy_json(legacy_json_path)
+        if self.count() and not conn.execute("SELECT 1 FROM daily_rollups LIMIT 1").fetchone():
+            self.rebuild_rollups()  # database created before rollups existed
+
+    def _connection(self):
+        # sqlite3 connections must not be shared between threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import_legacy_json(self, json_path):
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print("Could not import legacy store", json_path, e)
+            return
+        if isinstance(data, dict):
+            inserted = self.append([txn for txns in data.values() for txn in txns])
+            print(f"Imported {len(inserted)} transactions from {json_path}")
+
+    def append(self, transactions):
+        """
+        Atomically add transactions, skipping duplicates and rows without a valid
+        dd-mm-yyyy date. Returns the transactions that were actually inserted.
+        """
+        conn = self._connection()
+        inserted = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for txn in transactions:
+                try:
+                    dt = datetime.strptime(txn.get("Date", ""), "%d-%m-%Y")
+                except Exception:
+                    continue  # Skip transactions with invalid or missing dates.
+                month_key, month_ord, date_ord = dt.strftime("%b-%y"), dt.year * 12 + dt.month, dt.toordinal()
+                deposit, withdrawal = _to_float(txn.get("Deposit")), _to_float(txn.get("Withdrawal"))
+                balance = _to_float(txn.get("Balance"))
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO transactions "
+                    "(month_key, month_ord, date_ord, date, particulars, deposit, withdrawal, balance, dedup_key) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (month_key, month_ord, date_ord, txn["Date"], txn.get("Particulars") or "",
+                     deposit, withdrawal, balance, transaction_key(txn)),
+                )
+                if cursor.rowcount:
+                    inserted.append(txn)
+                    conn.execute(ROLLUP_UPSERT, (date_ord, month_key, month_ord, deposit or 0.0,
+                                                 withdrawal or 0.0, balance))
+            if inserted:
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('version', '1') "
+                    "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return inserted
+
+    def rebuild_rollups(self):
+        """Recompute daily_rollups from the transactions table."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM daily_rollups")
+            conn.execute(
+                "INSERT INTO daily_rollups (date_ord, month_key, month_ord, deposit, withdrawal, count, balance) "
+                "SELECT date_ord, month_key, month_ord, COALESCE(SUM(deposit), 0), COALESCE(SUM(withdrawal), 0), COUNT(*), "
+                "(SELECT t2.balance FROM transactions t2 WHERE t2.date_ord = t.date_ord AND t2.balance IS NOT NULL "
+                " ORDER BY t2.id DESC LIMIT 1) "
+                "FROM transactions t GROUP BY date_ord"
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def version(self):
+        """Counter bumped by every append that inserted rows."""
+        row = self._connection().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row["value"]) if row else 0
+
+    def count(self):
+        return self._connection().execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def months(self):
+        """Month keys ('Jan-25', ...) that have transactions, oldest first."""
+        rows = self._connection().execute(
+            "SELECT month_key FROM transactions GROUP BY month_key ORDER BY MIN(month_ord)"
+        ).fetchall()
+        return [row["month_key"] for row in rows]
+
+    def read_month(self, month_key):
+        """Transactions of one month, in ingest order."""
+        rows = self._connection().execute(
+            f"SELECT {COLUMNS} FROM transactions WHERE month_key = ? ORDER BY id", (month_key,)
+        ).fetchall()
+        return [_row_to_transaction(row) for row in rows]
+
+    def read_all(self):
+        """All transactions grouped by month key, in the shape of the old processed_output.json."""
+        data = {}
+        for row in self._connection().execute(
+            f"SELECT {COLUMNS} FROM transactions ORDER BY month_ord, id"
+        ):
+            data.setdefault(row["month_key"], []).append(_row_to_transaction(row))
+        return data
+
+    def read_daily_rollups(self, month_key):
+        """
+        Per-day totals of one month, oldest first, as dicts with Date ('dd-mm-yyyy'),
+        Deposit, Withdrawal, Count and Balance (after the day's last transaction).
+        """
+        rows = self._connection().execute(
+            "SELECT date_ord, deposit, withdrawal, count, balance FROM daily_rollups "
+            "WHERE month_key = ? ORDER BY date_ord", (month_key,)
+        ).fetchall()
+        return [{
+            "Date": date.fromordinal(row["date_ord"]).strftime("%d-%m-%Y"),
+            "Deposit": row["deposit"],
+            "Withdrawal": row["withdrawal"],
+            "Count": row["count"],
+            "Balance": row["balance"],
+        } for row in rows]
+
+    def last_id(self):
+        """Id of the newest row (0 when empty); rows appended later get larger ids."""
+        return self._connection().execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+
+    def read_inserted_since(self, last_id, transactions):
+        """
+        Those of `transactions` that were stored after `last_id`, read back from the store.
+        Lets a caller that crashed after append() find out which of its rows it inserted.
+        """
+        keys = {transaction_key(txn) for txn in transactions}
+        rows = self._connection().execute(
+            f"SELECT {COLUMNS}, dedup_key FROM transactions WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall()
+        return [_row_to_transaction(row) for row in rows if row["dedup_key"] in keys]
+
+    def read_since(self, last_id=0):
+        """
+        Rows added after `last_id`, as (id, month_key, date_ordinal, transaction) tuples in id order.
+        Lets readers that keep a copy in memory reload incrementally.
+        """
+        rows = self._connection().execute(
+            f"SELECT {COLUMNS} FROM transactions WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall()
+        return [(row["id"], row["month_key"], row["date_ord"], _row_to_transaction(row)) for row in rows]
+
+
+class TransactionSnapshot:
+    """
+    In-memory, query-ready copy of the store: `data` (month key -> transactions)
+    and `index`, a DateIndex over the same rows for date range lookups.
+
+    refresh() compares the store version with the one last loaded and, when it
+    changed, pulls only the rows added since (the store is append-only), so
+    repeated queries do not re-read or re-parse the whole history.
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+        self.data = {}
+        self.index = DateIndex()
+        self.last_id = 0
+        self.version = None
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        return self._store or get_store()
+
+    def refresh(self):
+        """Bring the snapshot up to date and return its month -> transactions dict."""
+        with self._lock:
+            version = self.store.version()
+            if version != self.version:
+                rows = self.store.read_since(self.last_id)
+                for row_id, month_key, _, txn in rows:
+                    self.data.setdefault(month_key, []).append(txn)
+                    self.last_id = row_id
+                self.index.add([row[3] for row in rows], ordinals=[row[2] for row in rows])
+                self.version = version
+                if rows:
+                    print(f"Transaction snapshot loaded {len(rows)} new rows (version {version}).")
+            return self.data
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the process-wide TransactionStore."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TransactionStore()
+    return _store
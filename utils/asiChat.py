@@ -1,18 +1,139 @@
 import json
 import os
+import threading
+import asyncio
 from dotenv import load_dotenv, find_dotenv
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from utils.llmCache import llm_cache, make_llm_cache_key, LLM_CACHE_ENABLED
 
 load_dotenv(find_dotenv())
 api_key = os.getenv("ASI_API_KEY")
 if not api_key:
     raise ValueError("ASI_API_KEY not found in .env")
 
+ASI_CHAT_URL = "https://api.asi1.ai/v1/chat/completions"
 
-def llmChat(messages, model="asi1-mini", max_tokens=8000, temperature=0, stream=False):
-    url = "https://api.asi1.ai/v1/chat/completions"
+# Connection pool settings for the shared HTTP session.
+# POOL_CONNECTIONS: number of per-host pools to keep around.
+# POOL_MAXSIZE: max open connections kept alive per host.
+# POOL_BLOCK: when true, callers wait for a free connection instead of
+#             opening connections beyond POOL_MAXSIZE (hard per-host limit).
+POOL_CONNECTIONS = int(os.getenv("ASI_POOL_CONNECTIONS", "4"))
+POOL_MAXSIZE = int(os.getenv("ASI_POOL_MAXSIZE", "16"))
+POOL_BLOCK = os.getenv("ASI_POOL_BLOCK", "true").lower() == "true"
+KEEP_ALIVE = os.getenv("ASI_KEEP_ALIVE", "true").lower() == "true"
+REQUEST_TIMEOUT = float(os.getenv("ASI_REQUEST_TIMEOUT", "100"))
+
+_session = None
+_session_lock = threading.Lock()
+
+_async_client = None
+_async_client_loop = None
+
+
+def get_session():
+    """Return the process-wide requests.Session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS,
+                                      pool_maxsize=POOL_MAXSIZE,
+                                      pool_block=POOL_BLOCK)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(_build_headers())
+                _session = session
+    return _session
+
+
+def get_connection_stats():
+    """
+    Return connection reuse counters for the shared session.
+
+    "new" is the number of connections opened so far and "reused" is the number
+    of requests that went over an already open keep-alive connection.
+    """
+    stats = {"requests": 0, "new": 0, "reused": 0}
+    if _session is None:
+        return stats
+    for adapter in set(_session.adapters.values()):
+        pool_manager = getattr(adapter, "poolmanager", None)
+        if pool_manager is None:
+            continue
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            stats["requests"] += pool.num_requests
+            stats["new"] += pool.num_connections
+    stats["reused"] = max(stats["requests"] - stats["new"], 0)
+    return stats
+
+
+def get_async_client():
+    """
+    Return the shared httpx.AsyncClient for the running event loop.
+
+    httpx clients are bound to the loop they were first used on, so a new one
+    is created if the agent's loop changes (e.g. after a restart in tests).
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        if _async_client is not None and not _async_client.is_closed:
+            # Close the previous loop's client there so its connections are not leaked.
+            if _async_client_loop is not None and not _async_client_loop.is_closed():
+                asyncio.run_coroutine_threadsafe(_async_client.aclose(), _async_client_loop)
+            else:
+                print("Previous async LLM client's loop is already closed; its connections are dropped with it.")
+        limits = httpx.Limits(max_connections=POOL_MAXSIZE,
+                              max_keepalive_connections=POOL_MAXSIZE if KEEP_ALIVE else 0)
+        _async_client = httpx.AsyncClient(headers=_build_headers(),
+                                          limits=limits,
+                                          timeout=REQUEST_TIMEOUT)
+        _async_client_loop = loop
+    return _async_client
+
+
+async def close_async_client():
+    """Close the shared httpx.AsyncClient if it belongs to the running loop."""
+    global _async_client, _async_client_loop
+    if _async_client is not None and _async_client_loop is asyncio.get_running_loop():
+        client, _async_client, _async_client_loop = _async_client, None, None
+        await client.aclose()
+
+
+def run_sync(coro):
+    """
+    asyncio.run() for synchronous callers of the async helpers: the loop's client
+    is closed before the temporary loop goes away, so its connections are not leaked.
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_async_client()
+    return asyncio.run(main())
+
+
+def _build_headers():
+    headers = {
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+        'Authorization': f"Bearer {api_key}"
+    }
+    headers['Connection'] = 'keep-alive' if KEEP_ALIVE else 'close'
+    return headers
+
+
+def format_messages(messages):
+    """Normalise LangChain messages or role/content dicts to OpenAI-style dicts."""
     # Convert LangChain Message objects to dicts
-    if hasattr(messages[0], 'type'):  # Detects if these are LangChain messages
+    if messages and hasattr(messages[0], 'type'):  # Detects if these are LangChain messages
         messages = [{"role": m.type, "content": m.content} for m in messages]
         
     # Map any non-standard roles to OpenAI-style roles
@@ -38,26 +159,127 @@ def llmChat(messages, model="asi1-mini", max_tokens=8000, temperature=0, stream=
         role = role_map.get(orig_role, "user")
 
         formatted_messages.append({"role": role, "content": content})
-    payload = json.dumps({
+    return formatted_messages
+
+
+def build_payload(messages, model="asi1-mini", max_tokens=8000, temperature=0, stream=False):
+    """Return the JSON request body for a chat completion call."""
+    return json.dumps({
         "model": model,
-        "messages": formatted_messages,
+        "messages": format_messages(messages),
         "temperature": temperature,
         "max_tokens": max_tokens,
         "stream": stream
     })
-    
-    headers = {
-        'Content-Type': 'application/json',
-        'Accept': 'application/json',
-        'Authorization': f"Bearer {api_key}"
-    }
 
-    response = requests.post(url, headers=headers, data=payload, timeout=100)
+
+def _cache_key_for(messages, model, max_tokens, temperature, stream, cache):
+    """
+    Return the response cache key for this call, or None if it should not be cached.
+    By default only temperature 0 calls are cached, and only when LLM_CACHE_ENABLED is set.
+    """
+    if stream:
+        return None
+    use_cache = cache if cache is not None else (LLM_CACHE_ENABLED and temperature == 0)
+    if not use_cache:
+        return None
+    return make_llm_cache_key(model, format_messages(messages), temperature, max_tokens)
+
+
+def llmChat(messages, model="asi1-mini", max_tokens=8000, temperature=0, stream=False, cache=None):
+    cache_key = _cache_key_for(messages, model, max_tokens, temperature, stream, cache)
+    if cache_key is not None:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            print("Status: cached")
+            return cached
+
+    payload = build_payload(messages, model, max_tokens, temperature, stream)
+
+    response = get_session().post(ASI_CHAT_URL, data=payload, timeout=REQUEST_TIMEOUT)
     print("Status:", response.status_code)
     # print("Response:", response.text)
+
+    if cache_key is not None and response.status_code == 200:
+        llm_cache.set(cache_key, response.text)
     
     return response.text
 
+
+async def llmChatAsync(messages, model="asi1-mini", max_tokens=8000, temperature=0, stream=False, cache=None):
+    """
+    Async counterpart of llmChat for use inside the uAgents REST handlers.
+
+    Takes the same arguments, normalises messages the same way and returns the
+    raw response body, so callers can parse it exactly like llmChat's output.
+    """
+    cache_key = _cache_key_for(messages, model, max_tokens, temperature, stream, cache)
+    if cache_key is not None:
+        cached = await asyncio.to_thread(llm_cache.get, cache_key)
+        if cached is not None:
+            print("Status: cached")
+            return cached
+
+    payload = build_payload(messages, model, max_tokens, temperature, stream)
+
+    response = await get_async_client().post(ASI_CHAT_URL, content=payload)
+    print("Status:", response.status_code)
+
+    if cache_key is not None and response.status_code == 200:
+        await asyncio.to_thread(llm_cache.set, cache_key, response.text)
+
+    return response.text
+
+
+async def parse_sse(lines):
+    """
+    Parse an OpenAI-style server-sent event stream. Takes an async iterator of text
+    lines and yields each decoded `data:` JSON object, stopping at `data: [DONE]`.
+    """
+    async for line in lines:
+        line = line.strip()
+        if not line.startswith("data:"):
+            continue  # blank keep-alive lines, comments and "event:" fields
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except json.JSONDecodeError:
+            print("Skipping malformed stream chunk:", data[:200])
+
+
+async def llmChatStream(messages, model="asi1-mini", max_tokens=8000, temperature=0):
+    """
+    Streaming counterpart of llmChatAsync: yields the answer text piece by piece as the
+    model produces it, instead of returning the whole response body at the end.
+    """
+    payload = build_payload(messages, model, max_tokens, temperature, stream=True)
+
+    async with get_async_client().stream("POST", ASI_CHAT_URL, content=payload) as response:
+        print("Status:", response.status_code)
+        if response.status_code != 200:
+            body = await response.aread()
+            raise RuntimeError(f"Streaming request failed ({response.status_code}): {body[:500]!r}")
+        async for chunk in parse_sse(response.aiter_lines()):
+            try:
+                delta = chunk["choices"][0].get("delta") or {}
+            except (KeyError, IndexError, TypeError):
+                continue
+            if delta.get("content"):
+                yield delta["content"]
+
+
+def completion_response(content, model="local"):
+    """
+    Wrap an answer produced without the LLM in the same JSON body llmChat returns,
+    so callers and the UI can read it from ["choices"][0]["message"]["content"].
+    """
+    return json.dumps({
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+    })
+
 # import os
 # import json
 # import requests
@@ -0,0 +1,22 @@
+import os
+from aiohttp import web
+
+# uAgents REST handlers return a single JSON model, so endpoints that need more than
+# that (streamed bodies, path parameters) are served by a small aiohttp app running
+# next to the agent, on the agent's own event loop.
+SIDE_SERVER_HOST = os.getenv("SIDE_SERVER_HOST", "0.0.0.0")
+
+
+async def start_side_server(routes, port, host=SIDE_SERVER_HOST):
+    """
+    Start an aiohttp server for `routes` (a list of aiohttp.web route definitions,
+    e.g. web.post("/path", handler)) on the running loop. Returns the AppRunner,
+    whose cleanup() stops the server.
+    """
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    print(f"Side server listening on http://{host}:{port}")
+    return runner
@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+import threading
+import diskcache
+
+# Opt-in: set LLM_CACHE_ENABLED=true to let llmChat reuse responses for
+# deterministic (temperature 0) calls. Individual calls can still force the
+# cache on or off with llmChat(..., cache=True/False).
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "INFO/cache/llm")
+LLM_CACHE_SIZE_LIMIT = int(os.getenv("LLM_CACHE_SIZE_LIMIT", str(256 * 1024 * 1024)))  # bytes
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # seconds
+
+
+class DiskCache:
+    """
+    Size-bounded LRU cache stored on local disk via diskcache.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the cache grows past `size_limit` bytes. Hit/miss counters
+    are kept by diskcache itself, so they are shared by every process using
+    the same directory.
+    """
+
+    def __init__(self, directory, size_limit, ttl=None):
+        self.directory = directory
+        self.size_limit = size_limit
+        self.ttl = ttl
+        self._cache = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            with self._lock:
+                if self._cache is None:
+                    cache = diskcache.Cache(self.directory,
+                                            size_limit=self.size_limit,
+                                            eviction_policy="least-recently-used")
+                    cache.stats(enable=True)
+                    self._cache = cache
+        return self._cache
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        return self.cache.get(key, default=None)
+
+    def set(self, key, value, expire=None):
+        self.cache.set(key, value, expire=expire if expire is not None else self.ttl)
+
+    def stats(self):
+        """Return hit/miss counters and current size of the cache."""
+        hits, misses = self.cache.stats()
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "entries": len(self.cache),
+            "size_bytes": self.cache.volume(),
+        }
+
+    def clear(self):
+        self.cache.clear()
+        self.cache.stats(reset=True)
+
+
+def make_llm_cache_key(model, messages, temperature, max_tokens):
+    """Content hash of everything that determines an LLM completion."""
+    raw = json.dumps([model, messages, temperature, max_tokens], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+llm_cache = DiskCache(LLM_CACHE_DIR, LLM_CACHE_SIZE_LIMIT, ttl=LLM_CACHE_TTL)
+
+
+def get_llm_cache_stats():
+    return llm_cache.stats()
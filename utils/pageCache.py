@@ -0,0 +1,40 @@
+import os
+import hashlib
+from utils.llmCache import DiskCache
+
+# Cache of extracted transactions per statement page, keyed by the page text.
+# Re-uploading a file (or a statement overlapping an older one) then only
+# sends the pages we have never seen to the LLM.
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "INFO/cache/pages")
+PAGE_CACHE_SIZE_LIMIT = int(os.getenv("PAGE_CACHE_SIZE_LIMIT", str(64 * 1024 * 1024)))  # bytes
+# Bump when the extraction prompt or parsers change so old results are not reused.
+PAGE_CACHE_VERSION = "1"
+
+page_cache = DiskCache(PAGE_CACHE_DIR, PAGE_CACHE_SIZE_LIMIT)
+
+
+def normalise_page_text(page_text):
+    """Collapse whitespace so layout-only differences in text extraction hash the same."""
+    return " ".join(page_text.split())
+
+
+def page_cache_key(page_text):
+    raw = PAGE_CACHE_VERSION + "\n" + normalise_page_text(page_text)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_cached_page(page_text):
+    """Return the cached transaction list for this page, or None."""
+    if not PAGE_CACHE_ENABLED:
+        return None
+    return page_cache.get(page_cache_key(page_text))
+
+
+def cache_page(page_text, transactions):
+    if PAGE_CACHE_ENABLED:
+        page_cache.set(page_cache_key(page_text), transactions)
+
+
+def get_page_cache_stats():
+    return page_cache.stats()